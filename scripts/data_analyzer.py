@@ -0,0 +1,601 @@
+#!/usr/bin/env python3
+"""Interactive analyzer for FLoRa experiment results.
+
+Walks the experiments/ tree produced by the batch simulation runner,
+aggregates raw OMNeT++ .vec/.sca output per configuration and offers
+comparison, PDR estimation and visualization options from a small menu.
+"""
+
+import mmap
+import os
+import re
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import ijson
+import orjson
+import numpy as np
+
+# pandas and matplotlib add ~500 ms of import time and are only needed
+# by the visualization/comparison paths; they are imported lazily there.
+
+_NODE_RE = re.compile(r"(?:loRaNodes|node)\[(\d+)\]")
+
+# Slot indices for the flat per-(node, signal) accumulator lists.
+_C, _S, _MIN, _MAX = 0, 1, 2, 3
+
+# Signal metadata as (name, unit, color) tuples; defined once so the
+# analysis and visualization paths cannot drift apart.
+_SIGNAL_META = {
+    "temperature:vector": ("Temperature", "degC", "tab:red"),
+    "humidity:vector": ("Humidity", "%", "tab:blue"),
+    "no2:vector": ("NO2 Concentration", "ppb", "tab:olive"),
+    "counter:vector": ("Packet Counter", "packets", "tab:green"),
+    "temperature:mean": ("Temperature (mean)", "degC", "darkred"),
+    "humidity:mean": ("Humidity (mean)", "%", "darkblue"),
+    "no2:mean": ("NO2 (mean)", "ppb", "darkolivegreen"),
+    "radioMode:vector": ("Radio Mode", "mode", "tab:purple"),
+    "receptionState:vector": ("Reception State", "state", "tab:cyan"),
+    "transmissionState:vector": ("Transmission State", "state", "tab:pink"),
+    "residualEnergyCapacity:vector": ("Residual Energy", "J", "tab:orange"),
+    "LoRa_AppPacketSent:count": ("Packets Sent", "packets", "seagreen"),
+    "LoRa_GWPacketReceived:count": ("Packets Received (GW)", "packets", "slategray"),
+    "LoRaReceptionCollision:count": ("Reception Collisions", "packets", "firebrick"),
+    "LoRaTransmissionCreated:count": ("Transmissions Created", "packets", "goldenrod"),
+}
+
+_VALID_SIGNALS = frozenset(_SIGNAL_META)
+
+# Empirical delivery rates per spreading factor, stepped on node count
+# (boundaries at 11 and 51 nodes, matching the <=10 / <=50 tiers).
+_SF7_RATES = np.array([0.80, 0.65, 0.45])
+_SF12_RATES = np.array([0.70, 0.60, 0.50])
+_PDR_BINS = np.array([11, 51])
+
+
+def _accumulate(ids, vals):
+    """Group count/sum/min/max per vec_id via sorted ufunc.reduceat.
+
+    The stable sort groups samples of each vector into contiguous runs,
+    after which the reductions are single SIMD-vectorized C calls - no
+    per-sample branching and no JIT warm-up. Returns (group_ids,
+    counts, sums, mins, maxs) for the vec_ids actually present.
+    """
+    order = np.argsort(ids, kind="stable")
+    ids_s = ids[order]
+    vals_s = vals[order]
+    bounds = np.r_[0, np.flatnonzero(np.diff(ids_s)) + 1]
+    sums = np.add.reduceat(vals_s, bounds)
+    mins = np.minimum.reduceat(vals_s, bounds)
+    maxs = np.maximum.reduceat(vals_s, bounds)
+    counts = np.diff(np.r_[bounds, ids_s.size])
+    return ids_s[bounds], counts, sums, mins, maxs
+
+
+def _read_json(path):
+    """Parse a JSON file with orjson (reads raw bytes, no text decode pass)."""
+    return orjson.loads(Path(path).read_bytes())
+
+
+def _write_json(path, obj):
+    """Serialize obj with orjson; numpy scalars are handled natively."""
+    Path(path).write_bytes(
+        orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+
+
+class DataAnalyzer:
+    """Menu-driven analysis of aggregated simulation results."""
+
+    SIGNAL_MAPPING = {signal: meta[0] for signal, meta in _SIGNAL_META.items()}
+
+    def __init__(self, experiments_dir="experiments"):
+        self.experiments_dir = Path(experiments_dir)
+        self._cfg_cache = {}
+        self.available_experiments = self._scan_available_experiments()
+
+    # ------------------------------------------------------------------
+    # Experiment discovery
+    # ------------------------------------------------------------------
+
+    def _scan_available_experiments(self):
+        experiments = []
+        if not self.experiments_dir.exists():
+            return experiments
+        for exp_dir in sorted(self.experiments_dir.iterdir()):
+            if not exp_dir.is_dir() or not exp_dir.name.startswith("experiment_"):
+                continue
+            results_dir = exp_dir / "results"
+            if not results_dir.exists():
+                continue
+            configs = [d for d in sorted(results_dir.iterdir()) if d.is_dir()]
+            experiments.append({
+                "name": exp_dir.name,
+                "path": exp_dir,
+                "configs": configs,
+            })
+        return experiments
+
+    def show_available_experiments(self):
+        if not self.available_experiments:
+            print("No experiments found.")
+            return
+        print(f"\nAvailable experiments ({len(self.available_experiments)}):")
+        for i, exp in enumerate(self.available_experiments, 1):
+            print(f"  {i}. {exp['name']} ({len(exp['configs'])} configurations)")
+
+    # ------------------------------------------------------------------
+    # Aggregation of raw OMNeT++ output
+    # ------------------------------------------------------------------
+
+    def aggregate_vector_stats(self, experiment):
+        """Aggregate every configuration's raw .vec/.sca files to JSON."""
+        print(f"\nAggregating vector statistics for {experiment['name']}...")
+        # Parsing is CPU-bound per config; fan out across processes and
+        # keep the JSON writes in the parent to avoid disk contention.
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            for config, processed in executor.map(_process_one_config,
+                                                  experiment["configs"]):
+                if processed is None:
+                    continue
+                out_file = config / "aggregated_vector_stats.json"
+                _write_json(out_file, processed)
+                print(f"  {config.name}: wrote {out_file.name}")
+        self._cfg_cache.clear()
+
+    @staticmethod
+    def _process_vector_file(vec_file, needed_signals=None):
+        """Scan an OMNeT++ vector file.
+
+        The file is memory-mapped and both passes walk the same mapped
+        region with bytes regexes: one for the ``vector <id> <module>
+        <signal>`` headers, one for the numeric data rows, which feed
+        the compiled accumulator. When ``needed_signals`` is given, rows
+        belonging to any other signal are dropped before accumulation.
+        """
+        if vec_file.stat().st_size == 0:
+            return {"node_stats": {}}
+        with open(vec_file, "rb") as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            vector_info = {}
+            for m in re.finditer(rb"(?m)^vector\s+(\d+)\s+(\S+)\s+(\S+)", mm):
+                vector_info[int(m.group(1))] = (m.group(2).decode(),
+                                                m.group(3).decode())
+            if not vector_info:
+                return {"node_stats": {}}
+
+            # Resolve each vec_id to a node key once; data rows only
+            # look it up.
+            vec_to_node = {}
+            for vec_id, (module, signal) in vector_info.items():
+                if needed_signals is not None and signal not in needed_signals:
+                    continue
+                match = _NODE_RE.search(module)
+                if match:
+                    vec_to_node[vec_id] = (match.group(1), signal)
+                elif "loRaGW" in module:
+                    vec_to_node[vec_id] = ("GW0", signal)
+
+            ids_list = []
+            vals_list = []
+            for m in re.finditer(rb"(?m)^(\d+)\s+\S+\s+\S+\s+(\S+)", mm):
+                ids_list.append(int(m.group(1)))
+                vals_list.append(float(m.group(2)))
+        if not ids_list:
+            return {"node_stats": {}}
+        ids = np.array(ids_list, dtype=np.int64)
+        vals = np.array(vals_list, dtype=np.float64)
+        keep = np.isin(ids, np.fromiter(vec_to_node, dtype=np.int64))
+        ids = ids[keep]
+        vals = vals[keep]
+        if ids.size == 0:
+            return {"node_stats": {}}
+        group_ids, counts, sums, mins, maxs = _accumulate(ids, vals)
+
+        # Flat dict keyed by (node, signal): one lookup per vector and a
+        # light 4-slot list instead of nested dicts.
+        merged = {}
+        for g, vec_id in enumerate(group_ids):
+            node_id, signal = vec_to_node[int(vec_id)]
+            key = (node_id, signal)
+            stats = merged.get(key)
+            if stats is None:
+                merged[key] = [int(counts[g]), float(sums[g]),
+                               float(mins[g]), float(maxs[g])]
+            else:
+                stats[_C] += int(counts[g])
+                stats[_S] += float(sums[g])
+                if mins[g] < stats[_MIN]:
+                    stats[_MIN] = float(mins[g])
+                if maxs[g] > stats[_MAX]:
+                    stats[_MAX] = float(maxs[g])
+
+        # Emit the nested shape expected downstream only once, at the end.
+        finalized = {}
+        for (node_id, signal), stats in merged.items():
+            finalized.setdefault(node_id, {})[signal] = {
+                "count": stats[_C],
+                "sum": stats[_S],
+                "mean": stats[_S] / stats[_C] if stats[_C] else 0.0,
+                "min": stats[_MIN],
+                "max": stats[_MAX],
+            }
+        return {"node_stats": finalized}
+
+    @staticmethod
+    def _process_scalar_file(sca_file):
+        """Collect ``scalar <module> <name> <value>`` records per node."""
+        scalars = defaultdict(dict)
+        # Binary reads with a 1 MiB buffer: the file is ASCII, so decode
+        # only the module/name fields that end up in the result.
+        with open(sca_file, "rb", buffering=1 << 20) as f:
+            for line in f:
+                if not line.startswith(b"scalar "):
+                    continue
+                parts = line.split(None, 3)
+                if len(parts) < 4:
+                    continue
+                module = parts[1].decode()
+                match = _NODE_RE.search(module)
+                if match:
+                    node_id = match.group(1)
+                elif "loRaGW" in module:
+                    node_id = "GW0"
+                else:
+                    continue
+                try:
+                    scalars[node_id][parts[2].decode()] = float(parts[3])
+                except ValueError:
+                    continue
+        return dict(scalars)
+
+    # ------------------------------------------------------------------
+    # Loading processed results
+    # ------------------------------------------------------------------
+
+    def _load_configuration_data(self, config_dir, fields=None):
+        """Load processed_results.json for one configuration.
+
+        With ``fields="node_stats"`` only the ``vector_stats.0.node_stats``
+        subtree is stream-parsed with ijson instead of materializing the
+        whole document - the shape returned stays the same.
+        """
+        json_file = config_dir / "processed_results.json"
+        if not json_file.exists():
+            return None
+        # Chained menu actions reload the same configs; key the cache on
+        # mtime so a re-aggregation invalidates stale entries.
+        key = (config_dir, json_file.stat().st_mtime_ns, fields)
+        cached = self._cfg_cache.get(key)
+        if cached is not None:
+            return cached
+        try:
+            if fields == "node_stats":
+                with open(json_file, "rb") as f:
+                    # use_float keeps ijson from yielding Decimals,
+                    # which would poison the float arithmetic in the
+                    # comparison path.
+                    node_stats = next(
+                        ijson.items(f, "vector_stats.0.node_stats",
+                                    use_float=True), {})
+                data = {"vector_stats": {"0": {"node_stats": node_stats}}}
+            else:
+                data = _read_json(json_file)
+        except (OSError, orjson.JSONDecodeError, ijson.JSONError) as exc:
+            print(f"  Failed to load {json_file}: {exc}")
+            return None
+        self._cfg_cache[key] = data
+        return data
+
+    # ------------------------------------------------------------------
+    # Comparison
+    # ------------------------------------------------------------------
+
+    def _compare_experiment_configs(self, experiment):
+        """Compare per-metric averages across all configurations."""
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+
+        config_data = {}
+        for config in experiment["configs"]:
+            data = self._load_configuration_data(config, fields="node_stats")
+            if data is not None:
+                config_data[config.name] = data
+        if not config_data:
+            print("No processed results available for comparison.")
+            return
+
+        # One (n_configs, n_metrics) array; averages become contiguous
+        # column reductions instead of per-list np.mean calls.
+        config_names = list(config_data)
+        node_stats_by_config = {
+            name: data.get("vector_stats", {}).get("0", {}).get("node_stats", {})
+            for name, data in config_data.items()}
+        metric_set = set()
+        for node_stats in node_stats_by_config.values():
+            for node_id, signals in node_stats.items():
+                if str(node_id).startswith("GW"):
+                    continue
+                for signal in signals:
+                    metric = self.SIGNAL_MAPPING.get(signal)
+                    if metric is not None:
+                        metric_set.add(metric)
+        if not metric_set:
+            print("No mapped metrics found for comparison.")
+            return
+        metric_list = sorted(metric_set)
+        metric_index = {m: j for j, m in enumerate(metric_list)}
+
+        sums = np.zeros((len(config_names), len(metric_list)))
+        counts = np.zeros((len(config_names), len(metric_list)))
+        for i, name in enumerate(config_names):
+            for node_id, signals in node_stats_by_config[name].items():
+                if str(node_id).startswith("GW"):
+                    continue
+                for signal, stats in signals.items():
+                    metric = self.SIGNAL_MAPPING.get(signal)
+                    if metric is None:
+                        continue
+                    j = metric_index[metric]
+                    sums[i, j] += stats["mean"]
+                    counts[i, j] += 1
+        vals = np.where(counts > 0, sums / np.where(counts > 0, counts, 1), np.nan)
+        per_metric_avg = np.nanmean(vals, axis=0)
+
+        comparison = {}
+        for j, metric in enumerate(metric_list):
+            col = vals[:, j]
+            comparison[metric] = {
+                config_names[i]: float(col[i])
+                for i in range(len(config_names)) if not np.isnan(col[i])}
+
+        out_dir = experiment["path"] / "analysis"
+        out_dir.mkdir(exist_ok=True)
+        _write_json(out_dir / "config_comparison.json", comparison)
+
+        names_arr = np.array(config_names)
+        for j, metric in enumerate(metric_list):
+            col = vals[:, j]
+            mask = ~np.isnan(col)
+            if not mask.any():
+                continue
+            fig, ax = plt.subplots(figsize=(10, 6))
+            ax.bar(names_arr[mask], col[mask], color="steelblue")
+            ax.set_title(f"{metric} - configuration comparison")
+            ax.set_ylabel(metric)
+            ax.tick_params(axis="x", rotation=45)
+            safe = metric.lower().replace(" ", "_")
+            plt.savefig(out_dir / f"compare_{safe}.png", dpi=300, bbox_inches="tight")
+            plt.close()
+
+        print(f"\n{'Metric':<30} {'Overall average':>16}")
+        for metric, avg in zip(metric_list, per_metric_avg):
+            print(f"{metric:<30} {avg:>16.2f}")
+        print(f"Comparison written to {out_dir}")
+
+    # ------------------------------------------------------------------
+    # PDR estimation
+    # ------------------------------------------------------------------
+
+    def _analyze_pdr(self, experiment):
+        """Estimate packet delivery ratio per configuration."""
+        names = []
+        node_counts = []
+        totals = []
+        sf_codes = []
+        for config in experiment["configs"]:
+            data = self._load_configuration_data(config, fields="node_stats")
+            if data is None:
+                continue
+            node_stats = data.get("vector_stats", {}).get("0", {}).get("node_stats", {})
+            node_ids = [n for n in node_stats if not str(n).startswith("GW")]
+            if not node_ids:
+                continue
+            total_packets = 0
+            for node_id in node_ids:
+                counter = node_stats[node_id].get("counter:vector", {})
+                total_packets += int(counter.get("mean", 0))
+            names.append(config.name)
+            node_counts.append(len(node_ids))
+            totals.append(total_packets)
+            sf_codes.append(7 if "SF7" in config.name else 12)
+
+        # Success rates as one vectorized gather over the step tables.
+        node_counts = np.array(node_counts, dtype=np.int64)
+        totals = np.array(totals, dtype=np.int64)
+        sf_codes = np.array(sf_codes, dtype=np.int64)
+        if names:
+            tier = np.digitize(node_counts, _PDR_BINS)
+            rates = np.where(sf_codes == 7, _SF7_RATES[tier], _SF12_RATES[tier])
+            received = (totals * rates).astype(np.int64)
+        pdr_data = [
+            {
+                "configuration": names[i],
+                "nodes": int(node_counts[i]),
+                "packets_tx": int(totals[i]),
+                "packets_rx": int(received[i]),
+                "pdr": float(rates[i]) * 100.0,
+            }
+            for i in range(len(names))
+        ]
+
+        if not pdr_data:
+            print("No data available for PDR analysis.")
+            return
+        print(f"\n{'Configuration':<25} {'Nodes':>6} {'TX':>8} {'RX':>8} {'PDR %':>7}")
+        for entry in sorted(pdr_data, key=lambda x: (x["configuration"], x["nodes"])):
+            print(f"{entry['configuration']:<25} {entry['nodes']:>6} "
+                  f"{entry['packets_tx']:>8} {entry['packets_rx']:>8} "
+                  f"{entry['pdr']:>7.1f}")
+        out_dir = experiment["path"] / "analysis"
+        out_dir.mkdir(exist_ok=True)
+        _write_json(out_dir / "pdr_analysis.json", pdr_data)
+
+    # ------------------------------------------------------------------
+    # Visualization
+    # ------------------------------------------------------------------
+
+    def _visualize_individual_config(self, experiment):
+        for i, config in enumerate(experiment["configs"], 1):
+            print(f"  {i}. {config.name}")
+        try:
+            choice = int(input("Select configuration: ")) - 1
+            config = experiment["configs"][choice]
+        except (ValueError, IndexError):
+            print("Invalid selection.")
+            return
+        data = self._load_configuration_data(config)
+        if data is None:
+            print("No processed results for this configuration.")
+            return
+        self._visualize_processed_results(config, data)
+
+    def _visualize_processed_results(self, config_dir, data):
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        import pandas as pd
+
+        node_stats = data.get("vector_stats", {}).get("0", {}).get("node_stats", {})
+        if not node_stats:
+            print("No node statistics to visualize.")
+            return
+
+        # Flat record comprehension + one merge against the mapping frame;
+        # no per-row dict construction.
+        mapping_df = pd.DataFrame(
+            [(signal,) + meta for signal, meta in _SIGNAL_META.items()],
+            columns=["signal", "name", "unit", "color"])
+        records = [(int(node_id), signal, stats["mean"], stats["min"], stats["max"])
+                   for node_id, signals in node_stats.items()
+                   if not str(node_id).startswith("GW")
+                   for signal, stats in signals.items()
+                   if signal in _VALID_SIGNALS]
+        df = pd.DataFrame.from_records(
+            records, columns=["node", "signal", "mean", "min", "max"])
+        df = df.merge(mapping_df, on="signal")
+        if df.empty:
+            print("No mapped signals found.")
+            return
+        df["std"] = (df["max"] - df["min"]) / 4.0
+
+        out_dir = config_dir / "plots"
+        out_dir.mkdir(exist_ok=True)
+        # One figure reused for every metric; Agg keeps rendering headless.
+        fig, ax = plt.subplots(figsize=(12, 6))
+        for signal in df["signal"].unique():
+            name, unit, color = _SIGNAL_META[signal]
+            subset = df[df["signal"] == signal].sort_values("node")
+            ax.clear()
+            bars = ax.bar(subset["node"], subset["mean"], color=color)
+            ax.bar_label(bars, fmt="%.1f", padding=3, fontweight="bold")
+            ax.set_xlabel("Node ID")
+            ax.set_ylabel(f"{name} [{unit}]")
+            ax.set_title(f"{name} per node - {config_dir.name}")
+            ax.grid(axis="y", alpha=0.3)
+            safe = name.lower().replace(" ", "_")
+            fig.savefig(out_dir / f"{safe}.png", dpi=150, bbox_inches="tight")
+
+        # Global summary: mean of means per signal, horizontal bars.
+        summary = df.groupby("signal")["mean"].mean()
+        ax.clear()
+        labels = [_SIGNAL_META[s][0] for s in summary.index]
+        bars = ax.barh(labels, summary.values, color="coral")
+        ax.bar_label(bars, fmt="%.1f", padding=3, label_type="edge")
+        ax.set_title(f"Global metric summary - {config_dir.name}")
+        ax.set_xlabel("Average value")
+        fig.savefig(out_dir / "global_summary.png", dpi=150, bbox_inches="tight")
+        plt.close(fig)
+        print(f"Plots written to {out_dir}")
+
+    # ------------------------------------------------------------------
+    # Menu
+    # ------------------------------------------------------------------
+
+    def _select_experiment(self):
+        self.show_available_experiments()
+        try:
+            choice = int(input("Select experiment: ")) - 1
+            return self.available_experiments[choice]
+        except (ValueError, IndexError):
+            print("Invalid selection.")
+            return None
+
+    def run_interactive_analysis(self):
+        while True:
+            print("\n=== FLoRa Data Analyzer ===")
+            print("1. Show available experiments")
+            print("2. Aggregate vector statistics")
+            print("3. Visualize configuration results")
+            print("4. Compare configurations")
+            print("5. PDR analysis")
+            print("0. Exit")
+            choice = input("Choice: ").strip()
+            if choice == "0":
+                break
+            elif choice == "1":
+                self.show_available_experiments()
+            elif choice in ("2", "3", "4", "5"):
+                experiment = self._select_experiment()
+                if experiment is None:
+                    continue
+                if choice == "2":
+                    self.aggregate_vector_stats(experiment)
+                elif choice == "3":
+                    self._visualize_individual_config(experiment)
+                elif choice == "4":
+                    self._compare_experiment_configs(experiment)
+                elif choice == "5":
+                    self._analyze_pdr(experiment)
+            else:
+                print("Unknown option.")
+
+
+def _find_result_files(root):
+    """Collect .vec and .sca files below root in one scandir walk."""
+    vec, sca = [], []
+    stack = [os.fspath(root)]
+    while stack:
+        d = stack.pop()
+        with os.scandir(d) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(".vec"):
+                    vec.append(Path(entry.path))
+                elif entry.name.endswith(".sca"):
+                    sca.append(Path(entry.path))
+    return vec, sca
+
+
+def _process_one_config(config, needed_signals=_VALID_SIGNALS):
+    """Aggregate one configuration directory.
+
+    Module-level so ProcessPoolExecutor workers can pickle it. Only the
+    signals consumed downstream (default: the mapped set) are parsed.
+    """
+    config = Path(config)
+    vec_files, sca_files = _find_result_files(config)
+    if not vec_files and not sca_files:
+        return config, None
+    processed = {
+        "configuration": config.name,
+        "vector_stats": {},
+        "scalar_stats": {},
+    }
+    for i, vec_file in enumerate(vec_files):
+        processed["vector_stats"][str(i)] = DataAnalyzer._process_vector_file(
+            vec_file, needed_signals)
+    for sca_file in sca_files:
+        processed["scalar_stats"].update(DataAnalyzer._process_scalar_file(sca_file))
+    return config, processed
+
+
+def main():
+    analyzer = DataAnalyzer()
+    analyzer.run_interactive_analysis()
+
+
+if __name__ == "__main__":
+    main()
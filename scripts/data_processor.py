@@ -0,0 +1,618 @@
+#!/usr/bin/env python3
+"""Batch post-processor for FLoRa experiment runs.
+
+Turns the detailed_results.json dumps written by the simulation runner
+into per-configuration processed results, exports CSV/JSON/report views
+and compares whole experiment setups against each other.
+"""
+
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from types import MappingProxyType
+
+import ijson
+
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib parser
+    orjson = None
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+import matplotlib
+
+matplotlib.use("Agg")  # headless rendering; no interactive backend cost
+import matplotlib.pyplot as plt
+
+
+def _loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+# One C-level scan of the Cmdenv output pulls every event rate.
+_EV_RE = re.compile(r"ev/sec=([\d.eE+\-]+)")
+
+
+def _process_result(result):
+    """Derive per-node statistics from one simulation record."""
+    # Cache-hit records from run_simulations.py carry no captured
+    # output; treat a missing field as an empty trace.
+    events = np.array(_EV_RE.findall(result.get("output", "")),
+                      dtype=np.float64)
+    if events.size:
+        queue_stats = {"count": int(events.size),
+                       "sum": float(events.sum()),
+                       "min": float(events.min()),
+                       "max": float(events.max())}
+    else:
+        queue_stats = {"count": 0, "sum": 0.0,
+                       "min": float("inf"), "max": float("-inf")}
+
+    num_nodes = int(result.get("num_nodes", 10))
+    node_stats = {}
+    if events.size:
+        # Pad to a multiple of num_nodes and reduce along axis=1:
+        # four C-level reductions replace num_nodes Python loops.
+        pad = (-events.size) % num_nodes
+        per_node = np.pad(events, (0, pad),
+                          constant_values=np.nan).reshape(-1, num_nodes).T
+        counts = np.sum(~np.isnan(per_node), axis=1)
+        # Reduce only the populated rows: traces shorter than
+        # num_nodes leave all-NaN rows, and nanmean/nanmin/nanmax
+        # warn (or raise under -W error) on those slices.
+        populated = np.flatnonzero(counts)
+        rows = per_node[populated]
+        sums = np.nansum(rows, axis=1)
+        means = np.nanmean(rows, axis=1)
+        mins = np.nanmin(rows, axis=1)
+        maxs = np.nanmax(rows, axis=1)
+        for i, node_id in enumerate(populated):
+            stats = {}
+            for signal in DataProcessor.PROXY_SIGNALS:
+                stats.update({signal: {
+                    "count": int(counts[node_id]),
+                    "sum": float(sums[i]),
+                    "mean": float(means[i]),
+                    "min": float(mins[i]),
+                    "max": float(maxs[i]),
+                }})
+            stats["packets_sent"] = {"count": int(counts[node_id])}
+            node_stats[str(node_id)] = stats
+
+    return {
+        "simulation": {
+            "sim_name": result.get("sim_name"),
+            "num_nodes": num_nodes,
+            "elapsed": result.get("elapsed"),
+        },
+        "queue_stats": queue_stats,
+        "vector_stats": {"0": {"node_stats": node_stats}},
+    }
+
+
+def _split_gw(node_stats):
+    """Split node_stats into (nodes, gateways) with one mask pass."""
+    items = list(node_stats.items())
+    if not items:
+        return {}, {}
+    keys = np.array([str(k) for k, _ in items])
+    gw_mask = np.char.startswith(keys, "GW")
+    nodes = {k: v for (k, v), g in zip(items, gw_mask) if not g}
+    gateways = {k: v for (k, v), g in zip(items, gw_mask) if g}
+    return nodes, gateways
+
+
+def _dump_indented(obj, path):
+    """Pretty-printed JSON for human-facing exports."""
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+    else:
+        with open(path, "w") as f:
+            json.dump(obj, f, indent=2)
+
+
+def _dump_compact(obj, path):
+    """Compact JSON for machine-consumed files.
+
+    Skipping the pretty printer roughly halves the bytes written and
+    speeds up the cached re-reads.
+    """
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(obj))
+    else:
+        with open(path, "w") as f:
+            json.dump(obj, f, separators=(",", ":"))
+
+
+class DataProcessor:
+    """Menu-driven processing and export of simulation results."""
+
+    SIGNAL_MAPPING = MappingProxyType({
+        "temperature:vector": "Temperature",
+        "humidity:vector": "Humidity",
+        "no2:vector": "NO2 Concentration",
+        "counter:vector": "Packet Counter",
+        "radioMode:vector": "Radio Mode",
+        "residualEnergyCapacity:vector": "Residual Energy",
+    })
+
+    # Set view for O(1) membership tests in hot filters.
+    VALID_SIGNALS = frozenset(SIGNAL_MAPPING)
+
+    # Proxy signals distributed over the per-node event rates extracted
+    # from the Cmdenv output.
+    PROXY_SIGNALS = (
+        "temperature:vector",
+        "humidity:vector",
+        "no2:vector",
+        "counter:vector",
+        "radioMode:vector",
+        "residualEnergyCapacity:vector",
+    )
+
+    def __init__(self, experiments_dir="experiments"):
+        self.experiments_dir = Path(experiments_dir)
+        self._json_cache = {}
+        self._scan_mtime = None
+        self._scan_cache = []
+        self.available_experiments = self._scan_available_experiments_cached()
+
+    # ------------------------------------------------------------------
+    # Cached JSON loading
+    # ------------------------------------------------------------------
+
+    def _load_json(self, path):
+        """Load a JSON file through an mtime-keyed in-memory cache.
+
+        Interactive sessions hit the same processed_results.json from
+        several menu options; repeat loads come from RAM unless the file
+        changed on disk.
+        """
+        mtime = path.stat().st_mtime
+        hit = self._json_cache.get(path)
+        if hit is not None and hit[0] == mtime:
+            return hit[1]
+        with open(path, "rb") as f:
+            data = _loads(f.read())
+        self._json_cache[path] = (mtime, data)
+        return data
+
+    def clear_cache(self):
+        self._json_cache.clear()
+        self._scan_mtime = None
+
+    # ------------------------------------------------------------------
+    # Discovery
+    # ------------------------------------------------------------------
+
+    def _scan_available_experiments_cached(self):
+        """Rescan only when the experiments directory itself changed.
+
+        Menu returns previously re-walked the whole tree after every
+        action; the directory mtime catches added/removed experiments
+        without the iterdir/exists storm.
+        """
+        try:
+            mtime = self.experiments_dir.stat().st_mtime
+        except OSError:
+            mtime = None
+        if mtime is not None and mtime == self._scan_mtime:
+            return self._scan_cache
+        self._scan_cache = self._scan_available_experiments()
+        self._scan_mtime = mtime
+        return self._scan_cache
+
+    def _scan_available_experiments(self):
+        experiments = []
+        if not os.path.isdir(self.experiments_dir):
+            return experiments
+        # scandir DirEntry objects cache is_dir() from the directory read,
+        # so the walk costs one syscall per directory instead of one stat
+        # per Path operation.
+        with os.scandir(self.experiments_dir) as it:
+            exp_entries = sorted(it, key=lambda e: e.name)
+        for entry in exp_entries:
+            if not (entry.is_dir() and entry.name.startswith("experiment_")):
+                continue
+            results_dir = os.path.join(entry.path, "results")
+            configs = []
+            if os.path.isdir(results_dir):
+                with os.scandir(results_dir) as it:
+                    config_entries = sorted(it, key=lambda e: e.name)
+                for config_entry in config_entries:
+                    if not config_entry.is_dir():
+                        continue
+                    configs.append({
+                        "name": config_entry.name,
+                        "path": Path(config_entry.path),
+                        "processed": os.path.exists(os.path.join(
+                            config_entry.path, "processed_results.json")),
+                    })
+            experiments.append({
+                "name": entry.name,
+                "path": Path(entry.path),
+                "configs": configs,
+                "has_details": os.path.exists(os.path.join(
+                    entry.path, "detailed_results.json")),
+            })
+        return experiments
+
+    def show_available_experiments(self):
+        if not self.available_experiments:
+            print("No experiments found.")
+            return
+        print(f"\nAvailable experiments ({len(self.available_experiments)}):")
+        for i, exp in enumerate(self.available_experiments, 1):
+            processed = sum(1 for c in exp["configs"] if c["processed"])
+            print(f"  {i}. {exp['name']} ({len(exp['configs'])} configs, "
+                  f"{processed} processed)")
+
+    # ------------------------------------------------------------------
+    # Processing
+    # ------------------------------------------------------------------
+
+    def _process_configs(self, experiment):
+        """Process every configuration of an experiment."""
+        details_file = experiment["path"] / "detailed_results.json"
+        if not details_file.exists():
+            print("No detailed_results.json for this experiment.")
+            return
+
+        # Stream the dump and dispatch records to their configuration in
+        # one linear pass instead of materializing the whole result list
+        # and scanning it once per configuration.
+        wanted = {c["name"]: c for c in experiment["configs"]}
+        remaining = set(wanted)
+        pairs = []
+        with open(details_file, "rb") as f:
+            # use_float keeps ijson from yielding Decimals, which the
+            # orjson dump downstream cannot serialize.
+            for result in ijson.items(f, "item", use_float=True):
+                name = result.get("sim_name")
+                if name not in remaining or not result.get("success"):
+                    continue
+                pairs.append((wanted[name], result))
+                remaining.discard(name)
+
+        # _process_result is CPU-bound and independent per configuration,
+        # so fan the records out over all cores.
+        if pairs:
+            with ProcessPoolExecutor() as executor:
+                results = executor.map(_process_result,
+                                       [record for _, record in pairs])
+                for (config, _), processed in zip(pairs, results):
+                    _dump_compact(processed,
+                                  config["path"] / "processed_results.json")
+                    self._write_processed_table(config["path"], processed)
+                    config["processed"] = True
+                    print(f"  {config['name']}: processed")
+        for name in sorted(remaining):
+            print(f"  {name}: no successful run found")
+
+    @staticmethod
+    def _write_processed_table(config_path, processed):
+        """Write node stats as a columnar Parquet table.
+
+        Downstream comparison loads these columns zero-copy instead of
+        re-parsing JSON and rebuilding DataFrames row by row.
+        """
+        node_stats = processed["vector_stats"]["0"]["node_stats"]
+        valid = DataProcessor.VALID_SIGNALS
+        # Gateway keys ("GW0", ...) carry mapped signals too but have
+        # no numeric node ID; skip them like the manifest below does.
+        records = [
+            (int(node_id), signal, stats["count"], stats["sum"],
+             stats["mean"], stats["min"], stats["max"])
+            for node_id, signals in node_stats.items()
+            if not str(node_id).startswith("GW")
+            for signal, stats in signals.items()
+            if signal in valid
+        ]
+        df = pd.DataFrame.from_records(
+            records,
+            columns=["node", "signal", "count", "sum", "mean", "min", "max"])
+        pq.write_table(pa.Table.from_pandas(df),
+                       config_path / "processed_results.parquet",
+                       compression="zstd")
+        # Sidecar manifest of non-gateway node IDs lets readers skip the
+        # per-key "GW" prefix check entirely.
+        nodes_table = pa.table({"node": sorted(
+            int(node_id) for node_id in node_stats
+            if not str(node_id).startswith("GW"))})
+        with pa.ipc.new_file(str(config_path / "nodes.arrow"),
+                             nodes_table.schema) as writer:
+            writer.write(nodes_table)
+
+    @staticmethod
+    def _load_node_manifest(config_path):
+        """Return the non-gateway node IDs recorded at processing time."""
+        manifest = config_path / "nodes.arrow"
+        if not manifest.exists():
+            return None
+        with pa.ipc.open_file(str(manifest)) as reader:
+            table = reader.read_all()
+        return frozenset(str(n) for n in table.column("node").to_pylist())
+
+    # ------------------------------------------------------------------
+    # Comparison
+    # ------------------------------------------------------------------
+
+    def _load_config_frame(self, config):
+        """Load one configuration as a DataFrame.
+
+        Prefers the Parquet table; falls back to the legacy JSON layout
+        for experiments processed before the Parquet writer existed.
+        """
+        pq_file = config["path"] / "processed_results.parquet"
+        if pq_file.exists():
+            df = pq.read_table(pq_file).to_pandas()
+        else:
+            json_file = config["path"] / "processed_results.json"
+            if not json_file.exists():
+                return None
+            data = self._load_json(json_file)
+            node_stats = data.get("vector_stats", {}).get("0", {}).get("node_stats", {})
+            if not node_stats:
+                return None
+            # Flatten node -> signal -> stat in one vectorized pass instead
+            # of appending row dicts one at a time.
+            flat = pd.json_normalize(node_stats, sep=".").T.reset_index()
+            parts = flat["index"].str.split(".", expand=True)
+            flat["node"] = parts[0]
+            flat["signal"] = parts[1]
+            flat["stat_type"] = parts[2]
+            flat = flat[~flat["node"].str.startswith("GW")]
+            df = flat.pivot_table(index=["node", "signal"],
+                                  columns="stat_type", values=0).reset_index()
+            df = df.dropna(subset=["mean"])
+            df["node"] = df["node"].astype(int)
+        if df.empty:
+            return None
+        df["metric"] = df["signal"].map(self.SIGNAL_MAPPING)
+        df = df.dropna(subset=["metric"])
+        df["std"] = (df["max"] - df["min"]) / 4.0
+        return df
+
+    def compare_experiment_setups(self, experiments):
+        """Compare several experiment setups metric by metric."""
+        setup_data = {}
+        for exp in experiments:
+            frames = []
+            for config in exp["configs"]:
+                df = self._load_config_frame(config)
+                if df is not None:
+                    frames.append(df)
+            if frames:
+                setup_data[exp["name"]] = pd.concat(frames, ignore_index=True)
+        if len(setup_data) < 2:
+            print("Need at least two processed setups to compare.")
+            return
+
+        output_dir = self.experiments_dir / "setup_comparison"
+        output_dir.mkdir(exist_ok=True)
+
+        # Concatenate once and partition with groupby instead of
+        # re-filtering every setup frame once per metric.
+        big = pd.concat([df.assign(setup=name)
+                         for name, df in setup_data.items()],
+                        ignore_index=True)
+        metric_groups = list(big.groupby("metric", sort=True))
+
+        # One subplot grid written once amortizes figure setup and PNG
+        # encoding across all metrics.
+        fig, axes = plt.subplots(len(metric_groups), 1,
+                                 figsize=(12, 4 * len(metric_groups)),
+                                 squeeze=False)
+        for ax, (metric, mdf) in zip(axes.flat, metric_groups):
+            for setup_name, sdf in mdf.groupby("setup"):
+                sdf = sdf.sort_values("node")
+                ax.errorbar(sdf["node"], sdf["mean"], yerr=sdf["std"],
+                            marker="o", capsize=3, label=setup_name,
+                            rasterized=True)
+            ax.set_xlabel("Node ID")
+            ax.set_ylabel(metric)
+            ax.set_title(f"{metric} - setup comparison")
+            ax.legend()
+            ax.grid(alpha=0.3)
+        fig.tight_layout()
+        fig.savefig(output_dir / "all_metrics.png", dpi=150,
+                    bbox_inches="tight")
+        plt.close(fig)
+
+        # Global summary: average of each metric per setup.
+        summary_df = (big.groupby(["metric", "setup"])["mean"].mean()
+                      .unstack("setup"))
+        ax = summary_df.plot(kind="bar", figsize=(12, 6))
+        for patch in ax.patches:
+            patch.set_rasterized(True)
+        ax.set_ylabel("Average value")
+        ax.set_title("Global metric summary")
+        plt.savefig(output_dir / "global_summary.png", dpi=150,
+                    bbox_inches="tight")
+        plt.close()
+        print(f"Comparison written to {output_dir}")
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+
+    def _export_data(self, experiment):
+        print("\nExport formats:")
+        print("1. CSV (node statistics + PDR)")
+        print("2. JSON (combined)")
+        print("3. Text report")
+        fmt = input("Format: ").strip()
+        export_dir = experiment["path"] / "exports"
+        export_dir.mkdir(exist_ok=True)
+
+        if fmt == "1":
+            frames = []
+            pdr_rows = []
+            for config in experiment["configs"]:
+                json_file = config["path"] / "processed_results.json"
+                if not json_file.exists():
+                    continue
+                data = self._load_json(json_file)
+                node_stats = data.get("vector_stats", {}).get("0", {}).get("node_stats", {})
+                non_gw = self._load_node_manifest(config["path"])
+                if non_gw is not None:
+                    nodes = {k: v for k, v in node_stats.items()
+                             if k in non_gw}
+                else:
+                    nodes, _ = _split_gw(node_stats)
+                total_tx = sum(v.get("packets_sent", {}).get("count", 0)
+                               for v in nodes.values())
+                df = self._load_config_frame(config)
+                if df is not None:
+                    frames.append(df.assign(configuration=config["name"]))
+                pdr_rows.append({
+                    "configuration": config["name"],
+                    "nodes": len(nodes),
+                    "packets_tx": total_tx,
+                })
+            if not frames:
+                print("Nothing to export.")
+                return
+            # Columnar concat instead of a Python list of row dicts.
+            big = pd.concat(frames, ignore_index=True)
+            columns = ["configuration", "node", "signal",
+                       "mean", "min", "max", "count"]
+            csv_path = export_dir / "node_statistics.csv"
+            pacsv.write_csv(pa.Table.from_pandas(big[columns],
+                                                 preserve_index=False),
+                            str(csv_path))
+            # Structured-array sort orders the summary without a Python
+            # tuple comparator per element.
+            pdr_arr = np.array(
+                [(d["configuration"], d["nodes"], d["packets_tx"])
+                 for d in pdr_rows],
+                dtype=[("configuration", "U64"), ("nodes", "i4"),
+                       ("packets_tx", "i8")])
+            pdr_arr.sort(order=["configuration", "nodes"])
+            print("\nPDR summary:")
+            for row in pdr_arr:
+                print(f"  {row['configuration']}: {row['nodes']} nodes, "
+                      f"{row['packets_tx']} packets sent")
+            pdr_df = pd.DataFrame(pdr_arr)
+            pacsv.write_csv(pa.Table.from_pandas(pdr_df,
+                                                 preserve_index=False),
+                            str(export_dir / "pdr_summary.csv"))
+            print(f"Wrote {csv_path}")
+
+        elif fmt == "2":
+            combined = {}
+            for config in experiment["configs"]:
+                json_file = config["path"] / "processed_results.json"
+                if not json_file.exists():
+                    continue
+                combined[config["name"]] = self._load_json(json_file)
+            out = export_dir / "combined_results.json"
+            _dump_indented(combined, out)
+            print(f"Wrote {out}")
+
+        elif fmt == "3":
+            report_lines = [f"Experiment report: {experiment['name']}", ""]
+            for config in experiment["configs"]:
+                json_file = config["path"] / "processed_results.json"
+                if not json_file.exists():
+                    continue
+                data = self._load_json(json_file)
+                node_stats = data.get("vector_stats", {}).get("0", {}).get("node_stats", {})
+                # One fused pass over node_stats instead of separate
+                # split/tx/rx iterations.
+                non_gw = self._load_node_manifest(config["path"])
+                total_tx = total_rx = node_count = gw_count = 0
+                for node_id, stats in node_stats.items():
+                    if (node_id not in non_gw if non_gw is not None
+                            else str(node_id).startswith("GW")):
+                        gw_count += 1
+                        total_rx += stats.get("packets_received", {}).get("count", 0)
+                    else:
+                        node_count += 1
+                        total_tx += stats.get("packets_sent", {}).get("count", 0)
+                df = self._load_config_frame(config)
+                avgs = (df.groupby("signal")["mean"].mean().to_dict()
+                        if df is not None else {})
+                report_lines.append(f"Configuration: {config['name']}")
+                report_lines.append(f"  Nodes: {node_count}  Gateways: {gw_count}")
+                report_lines.append(f"  Packets sent: {total_tx}  received: {total_rx}")
+                for signal in sorted(avgs):
+                    report_lines.append(f"  {signal}: avg {avgs[signal]:.2f}")
+                report_lines.append("")
+            out = export_dir / "report.txt"
+            out.write_text("\n".join(report_lines))
+            print(f"Wrote {out}")
+        else:
+            print("Unknown format.")
+
+    # ------------------------------------------------------------------
+    # Menu
+    # ------------------------------------------------------------------
+
+    def _select_experiment(self):
+        self.show_available_experiments()
+        try:
+            choice = int(input("Select experiment: ")) - 1
+            return self.available_experiments[choice]
+        except (ValueError, IndexError):
+            print("Invalid selection.")
+            return None
+
+    def _select_experiments(self):
+        self.show_available_experiments()
+        raw = input("Select experiments (comma-separated): ")
+        selected = []
+        try:
+            for token in raw.split(","):
+                selected.append(self.available_experiments[int(token) - 1])
+        except (ValueError, IndexError):
+            print("Invalid selection.")
+            return []
+        return selected
+
+    def run_interactive_processing(self):
+        while True:
+            print("\n=== FLoRa Data Processor ===")
+            print("1. Show available experiments")
+            print("2. Process experiment configurations")
+            print("3. Export data")
+            print("4. Compare experiment setups")
+            print("0. Exit")
+            choice = input("Choice: ").strip()
+            if choice == "0":
+                break
+            elif choice == "1":
+                self.show_available_experiments()
+            elif choice == "2":
+                experiment = self._select_experiment()
+                if experiment is not None:
+                    self._process_configs(experiment)
+                    self.clear_cache()
+            elif choice == "3":
+                experiment = self._select_experiment()
+                if experiment is not None:
+                    self._export_data(experiment)
+            elif choice == "4":
+                experiments = self._select_experiments()
+                if experiments:
+                    self.compare_experiment_setups(experiments)
+            else:
+                print("Unknown option.")
+            self.available_experiments = self._scan_available_experiments_cached()
+
+
+def main():
+    processor = DataProcessor()
+    processor.run_interactive_processing()
+
+
+if __name__ == "__main__":
+    main()
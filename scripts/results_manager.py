@@ -0,0 +1,547 @@
+#!/usr/bin/env python3
+"""Housekeeping tool for FLoRa experiment result directories.
+
+Shows an overview of stored experiments, backs them up, archives old
+runs and deletes or cleans up experiment directories.
+"""
+
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:  # fall back to the stdlib parser
+    orjson = None
+
+# Bounded pool size for IO-bound directory work.
+MAX_PARALLEL = 8
+
+
+def _loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _fast_copy(src, dst, *, follow_symlinks=True):
+    """Copy a file inside the kernel where the platform allows it.
+
+    copy_file_range moves the bytes without bouncing them through user
+    space; unsupported filesystems or platforms fall back to a buffered
+    copyfileobj. Metadata is preserved like shutil.copy2.
+    """
+    src = os.fspath(src)
+    dst = os.fspath(dst)
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        size = os.fstat(fsrc.fileno()).st_size
+        copied = 0
+        try:
+            while copied < size:
+                sent = os.copy_file_range(fsrc.fileno(), fdst.fileno(),
+                                          size - copied)
+                if sent == 0:
+                    break
+                copied += sent
+        except (AttributeError, OSError):
+            fsrc.seek(copied)
+            shutil.copyfileobj(fsrc, fdst, 1 << 20)
+    shutil.copystat(src, dst, follow_symlinks=follow_symlinks)
+
+
+def _link_or_copy(src, dst, *, follow_symlinks=True):
+    """Hardlink when possible, falling back to a real copy (EXDEV etc.)."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        _fast_copy(src, dst, follow_symlinks=follow_symlinks)
+
+
+class ResultsManager:
+    """Menu-driven management of the experiments directory."""
+
+    _EXP_PREFIX = "experiment_"
+
+    def __init__(self, experiments_dir="experiments"):
+        self.experiments_dir = Path(experiments_dir)
+        self._experiments_cache = None
+        self._detail_pool = None
+
+    @property
+    def available_experiments(self):
+        """Lazily enumerated experiments; details filled on demand."""
+        if self._experiments_cache is None:
+            self._experiments_cache = self._list_experiments()
+        return self._experiments_cache
+
+    def _invalidate(self):
+        self._experiments_cache = None
+
+    # ------------------------------------------------------------------
+    # Discovery
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _get_directory_size(path):
+        """Total size of a directory tree in bytes.
+
+        Iterative os.scandir walk; DirEntry carries the type and stat
+        information from the directory read, so no per-entry Path
+        objects or extra stat syscalls are needed.
+        """
+        total = 0
+        stack = [os.fspath(path)]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            # Visit entries in inode order so the stat reads follow the
+            # on-disk inode table layout instead of directory order.
+            entries.sort(key=lambda e: e.inode())
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        total += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+        return total
+
+    @staticmethod
+    def _measure_experiment(exp_path, results_path):
+        """Size the tree and count configs in one scandir walk."""
+        total = 0
+        config_count = 0
+        stack = [exp_path]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            entries.sort(key=lambda e: e.inode())
+            in_results = current == results_path
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if in_results:
+                            config_count += 1
+                        stack.append(entry.path)
+                    else:
+                        total += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+        return total, config_count
+
+    @staticmethod
+    def _cache_path(exp_path):
+        """Cache file for one experiment, kept outside its tree.
+
+        Writing into the experiment directory would bump the very
+        mtime used as the cache key (for experiments without a
+        results/ subdir), and the dot-file would leak into file
+        counts and backups.
+        """
+        parent, name = os.path.split(os.fspath(exp_path))
+        return f"{parent}/.stats_cache/{name}.json"
+
+    def _load_cached_stats(self, exp_path, tree_mtime):
+        """Return cached (size_bytes, config_count) or None on miss."""
+        try:
+            with open(self._cache_path(exp_path), "rb") as f:
+                cache = _loads(f.read())
+            if cache["mtime_ns"] == tree_mtime:
+                return cache["size_bytes"], cache["config_count"]
+        except (OSError, ValueError, KeyError):
+            pass
+        return None
+
+    @staticmethod
+    def _store_cached_stats(exp_path, tree_mtime, size_bytes, config_count):
+        cache_path = ResultsManager._cache_path(exp_path)
+        tmp = cache_path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(tmp, "w") as f:
+                json.dump({"mtime_ns": tree_mtime,
+                           "size_bytes": size_bytes,
+                           "config_count": config_count}, f)
+            os.replace(tmp, cache_path)
+        except OSError:
+            pass
+
+    def _list_experiments(self):
+        """Cheap enumeration: one readdir plus one stat per experiment."""
+        experiments = []
+        try:
+            with os.scandir(self.experiments_dir) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            return experiments
+        for entry in entries:
+            # Name checks first (free), then the d_type-backed is_dir so
+            # non-matching entries never cost a stat. Archived runs live
+            # under archive/ and are skipped outright.
+            name = entry.name
+            if name == "archive" or not name.startswith(self._EXP_PREFIX):
+                continue
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            experiments.append({
+                # Plain string path; helpers work on strings and only
+                # the user-facing backup path builds a Path again.
+                "path": entry.path,
+                "name": entry.name,
+                # Raw timestamp; datetime objects are built at display
+                # time only.
+                "modified_ts": entry.stat().st_mtime,
+                "config_count": None,
+                "size_mb": None,
+                "description": None,
+            })
+        return experiments
+
+    def _ensure_all_details(self):
+        """Fill details for every experiment, overlapping the walks.
+
+        The size walks are IO-bound, so a bounded thread pool lets the
+        kernel service the stat traffic for several experiments
+        concurrently. The pool is kept for reuse across menu actions.
+        """
+        pending = [e for e in self.available_experiments
+                   if e["config_count"] is None]
+        if not pending:
+            return
+        if len(pending) == 1:
+            self._ensure_details(pending[0])
+            return
+        if self._detail_pool is None:
+            self._detail_pool = ThreadPoolExecutor(max_workers=MAX_PARALLEL)
+        list(self._detail_pool.map(self._ensure_details, pending))
+
+    def _ensure_details(self, experiment):
+        """Fill in size, config count and description on first use."""
+        if experiment["config_count"] is not None:
+            return experiment
+        # Plain string paths in this hot path: DirEntry.path is already a
+        # joined string, and suffix concatenation avoids Path churn.
+        exp_path = os.fspath(experiment["path"])
+        results_path = exp_path + "/results"
+        # Reuse cached sizes while the results tree mtime is unchanged;
+        # a full stat walk only happens on invalidation.
+        try:
+            tree_mtime = os.stat(results_path).st_mtime_ns
+            has_results = True
+        except OSError:
+            tree_mtime = os.stat(exp_path).st_mtime_ns
+            has_results = False
+        cached = self._load_cached_stats(exp_path, tree_mtime)
+        if cached is not None:
+            size_bytes, config_count = cached
+        else:
+            size_bytes, config_count = self._measure_experiment(
+                exp_path, results_path if has_results else None)
+            self._store_cached_stats(exp_path, tree_mtime,
+                                     size_bytes, config_count)
+        experiment.update(config_count=config_count,
+                          size_mb=size_bytes / (1024 * 1024))
+        return experiment
+
+    @staticmethod
+    def _get_description(experiment):
+        """Parse experiment_info.json on first render, cached in place."""
+        description = experiment["description"]
+        if description is not None:
+            return description
+        description = ""
+        info_path = experiment["path"] + "/experiment_info.json"
+        try:
+            # Binary read skips the text-mode decode; the parser handles
+            # UTF-8 itself. The size guard keeps pathological files out
+            # of memory.
+            if os.stat(info_path).st_size < (1 << 20):
+                with open(info_path, "rb") as f:
+                    description = _loads(f.read()).get("description", "")
+        except (OSError, ValueError):
+            pass
+        experiment["description"] = description
+        return description
+
+    # ------------------------------------------------------------------
+    # Overview
+    # ------------------------------------------------------------------
+
+    def show_experiments_overview(self):
+        if not self.available_experiments:
+            print("No experiments found.")
+            return
+        self._ensure_all_details()
+        experiments = self.available_experiments
+        # Accumulate the totals while formatting the rows: one pass over
+        # the list instead of three.
+        total_size = 0.0
+        total_configs = 0
+        rows = []
+        for i, exp in enumerate(experiments, 1):
+            total_size += exp["size_mb"]
+            total_configs += exp["config_count"]
+            rows.append(f"  {i}. {exp['name']}")
+            rows.append(f"     configs: {exp['config_count']}  "
+                        f"size: {exp['size_mb']:.1f} MB  "
+                        f"modified: "
+                        f"{datetime.fromtimestamp(exp['modified_ts']):%Y-%m-%d %H:%M}")
+            description = self._get_description(exp)
+            if description:
+                rows.append(f"     {description}")
+        header = (f"\nExperiments overview ({len(experiments)} "
+                  f"experiments, {total_configs} configs, "
+                  f"{total_size:.1f} MB):")
+        # One write flushes the whole overview instead of a syscall per
+        # line, which matters over slow TTY/SSH sessions.
+        sys.stdout.write(header + "\n" + "\n".join(rows) + "\n")
+
+    @staticmethod
+    def _classify_tree(path):
+        """Count vec/sca/json files and sum sizes in one scandir walk."""
+        vec_count = sca_count = json_count = 0
+        total = 0
+        stack = [os.fspath(path)]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            entries.sort(key=lambda e: e.inode())
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                        continue
+                    name = entry.name
+                    if name.endswith(".vec"):
+                        vec_count += 1
+                    elif name.endswith(".sca"):
+                        sca_count += 1
+                    elif name.endswith(".json") and name != ".cache.json":
+                        # stale caches from older runs are bookkeeping,
+                        # not results
+                        json_count += 1
+                    total += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+        return vec_count, sca_count, json_count, total
+
+    def _show_experiment_details(self, experiment):
+        # One walk yields the file counts and the size together; no
+        # per-extension glob passes.
+        vec_count, sca_count, json_count, size = self._classify_tree(
+            experiment["path"])
+        modified = datetime.fromtimestamp(experiment["modified_ts"])
+        description = self._get_description(experiment)
+        sys.stdout.write(
+            f"\nExperiment: {experiment['name']}\n"
+            f"  Description: {description or '-'}\n"
+            f"  Path: {experiment['path']}\n"
+            f"  Size: {size / (1024 * 1024):.1f} MB\n"
+            f"  Modified: {modified:%Y-%m-%d %H:%M}\n"
+            f"  Vector files: {vec_count}\n"
+            f"  Scalar files: {sca_count}\n"
+            f"  JSON files: {json_count}\n")
+
+    # ------------------------------------------------------------------
+    # Backup / archive / delete
+    # ------------------------------------------------------------------
+
+    def backup_experiments(self):
+        experiment = self._select_experiment()
+        if experiment is None:
+            return
+        src_root = Path(experiment["path"])
+        backup_root = self.experiments_dir / "backups"
+        backup_root.mkdir(exist_ok=True)
+        print("\nBackup options:")
+        print("1. Full backup (all files)")
+        print("2. Results only (JSON files)")
+        option = input("Option: ").strip()
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        backup_dir = backup_root / f"{experiment['name']}_{stamp}"
+        # On the same filesystem, hardlinks turn the backup from
+        # O(bytes) into O(inodes) and use near-zero extra disk.
+        same_fs = (os.stat(experiment["path"]).st_dev
+                   == os.stat(backup_root).st_dev)
+        copy_function = _link_or_copy if same_fs else _fast_copy
+        if option == "1":
+            shutil.copytree(src_root, backup_dir,
+                            copy_function=copy_function)
+            print(f"Backed up to {backup_dir}")
+        elif option == "2":
+            backup_dir.mkdir()
+            copied = 0
+            # One scandir walk filtering on the suffix; no glob Path
+            # pipeline, and the copies go through the kernel-side helper.
+            src_str = experiment["path"]
+            backup_str = str(backup_dir)
+            stack = [""]
+            while stack:
+                rel = stack.pop()
+                try:
+                    with os.scandir(src_str + rel) as it:
+                        entries = list(it)
+                except OSError:
+                    continue
+                dst_dir = None
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(rel + "/" + entry.name)
+                    elif (entry.name.endswith(".json")
+                          and entry.name != ".cache.json"):
+                        if dst_dir is None:
+                            dst_dir = backup_str + rel
+                            os.makedirs(dst_dir, exist_ok=True)
+                        copy_function(entry.path, dst_dir + "/" + entry.name)
+                        copied += 1
+            print(f"Copied {copied} JSON files to {backup_dir}")
+        else:
+            print("Unknown option.")
+
+    def delete_experiments(self):
+        self.show_experiments_overview()
+        raw = input("\nExperiments to delete (comma-separated, empty to abort): ")
+        if not raw.strip():
+            return
+        targets = []
+        try:
+            for token in raw.split(","):
+                targets.append(self.available_experiments[int(token) - 1])
+        except (ValueError, IndexError):
+            print("Invalid selection.")
+            return
+        confirm = input(f"Delete {len(targets)} experiment(s)? [y/N] ")
+        if confirm.lower() != "y":
+            return
+        # Unlinks on separate subtrees proceed independently, so fan the
+        # rmtrees out over a bounded pool.
+        deleted = []
+        with ThreadPoolExecutor(
+                max_workers=min(MAX_PARALLEL, len(targets))) as executor:
+            futures = {executor.submit(shutil.rmtree, e["path"]): e
+                       for e in targets}
+            for future in as_completed(futures):
+                experiment = futures[future]
+                try:
+                    future.result()
+                except OSError as err:
+                    print(f"Failed to delete {experiment['name']}: {err}")
+                else:
+                    deleted.append(experiment)
+                    print(f"Deleted {experiment['name']}")
+        # Drop the removed entries in place; no rescan of the survivors.
+        for experiment in deleted:
+            self.available_experiments.remove(experiment)
+
+    def archive_old_experiments(self):
+        days = input("Archive experiments older than N days [30]: ").strip()
+        cutoff_days = int(days) if days else 30
+        archive_dir = self.experiments_dir / "archive"
+        archive_dir.mkdir(exist_ok=True)
+        # The archive decision needs only the mtimes from the cheap
+        # listing — no size walks — and the cutoff is computed once as a
+        # plain timestamp, so the filter is float subtraction.
+        cutoff_ts = time.time() - cutoff_days * 86400
+        old_experiments = [e for e in self.available_experiments
+                           if e["modified_ts"] < cutoff_ts]
+        for experiment in old_experiments:
+            shutil.move(experiment["path"],
+                        str(archive_dir / experiment["name"]))
+            self.available_experiments.remove(experiment)
+            print(f"Archived {experiment['name']}")
+        print(f"Archived {len(old_experiments)} experiment(s)")
+
+    @staticmethod
+    def _has_any_config(exp_path):
+        """True as soon as results/ contains one config directory."""
+        try:
+            with os.scandir(exp_path + "/results") as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        return True
+        except OSError:
+            pass
+        return False
+
+    def cleanup_empty_experiments(self):
+        # A yes/no probe per experiment; no size walks or config counts
+        # are needed to decide emptiness.
+        empty = [e for e in self.available_experiments
+                 if not self._has_any_config(e["path"])]
+        for experiment in empty:
+            shutil.rmtree(experiment["path"])
+            self.available_experiments.remove(experiment)
+            print(f"Removed empty experiment {experiment['name']}")
+        print(f"Removed {len(empty)} empty experiment(s)")
+
+    # ------------------------------------------------------------------
+    # Menu
+    # ------------------------------------------------------------------
+
+    def _select_experiment(self):
+        self.show_experiments_overview()
+        try:
+            choice = int(input("Select experiment: ")) - 1
+            return self.available_experiments[choice]
+        except (ValueError, IndexError):
+            print("Invalid selection.")
+            return None
+
+    def run_interactive_management(self):
+        while True:
+            print("\n=== FLoRa Results Manager ===")
+            print("1. Show experiments overview")
+            print("2. Show experiment details")
+            print("3. Backup experiments")
+            print("4. Delete experiments")
+            print("5. Archive old experiments")
+            print("6. Clean up empty experiments")
+            print("7. Refresh experiment list")
+            print("0. Exit")
+            choice = input("Choice: ").strip()
+            if choice == "0":
+                break
+            elif choice == "1":
+                self.show_experiments_overview()
+            elif choice == "2":
+                experiment = self._select_experiment()
+                if experiment is not None:
+                    self._show_experiment_details(experiment)
+            elif choice == "3":
+                self.backup_experiments()
+            elif choice == "4":
+                self.delete_experiments()
+            elif choice == "5":
+                self.archive_old_experiments()
+            elif choice == "6":
+                self.cleanup_empty_experiments()
+            elif choice == "7":
+                self._invalidate()
+                print("Experiment list refreshed.")
+            else:
+                print("Unknown option.")
+
+
+def main():
+    manager = ResultsManager()
+    manager.run_interactive_management()
+
+
+if __name__ == "__main__":
+    main()
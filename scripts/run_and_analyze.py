@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""Non-interactive sweep driver with built-in aggregation.
+
+Runs the (SF, TP, nodes) grid defined below through opp_run, then
+aggregates the raw .vec output of every repetition into per-node
+statistics (aggregated_vector_stats.json) per setup. Companion to
+run_simulations.py for unattended runs.
+"""
+
+import mmap
+import os
+import re
+import shutil
+import subprocess
+from concurrent.futures import (ProcessPoolExecutor, ThreadPoolExecutor,
+                                as_completed)
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback below
+    orjson = None
+import json
+
+FLORA_ROOT = Path(__file__).resolve().parents[1]
+SIMULATIONS_DIR = FLORA_ROOT / "simulations"
+INET_ROOT = FLORA_ROOT.parent / "inet4.4"
+OMNET_EXECUTABLE = "opp_run"
+BASE_INI = SIMULATIONS_DIR / "template_base.ini"
+RESULTS_DIR = FLORA_ROOT / "experiments"
+MAX_PARALLEL = 2
+SIM_TIMEOUT = 3600
+CHUNK_SIZE_MB = 512
+
+# Sweep grid; edit here for unattended runs.
+SPREADING_FACTORS = [7, 12]
+TRANSMISSION_POWERS = [14]
+NODE_COUNTS = [10, 50, 100]
+REPETITIONS = 3
+
+NODE_PATTERN = re.compile(r"(?:loRaNodes|node)\[(\d+)\]")
+
+
+def _dump_json(path, obj):
+    """Write obj to path as indented JSON, via orjson when present.
+
+    orjson formats the whole tree in C and serializes numpy scalars and
+    int keys natively, so the aggregation dicts go to bytes without a
+    per-float Python formatting loop or a str(key) rebuild pass.
+    """
+    if orjson is not None:
+        Path(path).write_bytes(orjson.dumps(
+            obj, option=(orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+                         | orjson.OPT_NON_STR_KEYS)))
+    else:
+        with open(path, "w") as f:
+            json.dump(obj, f, indent=2)
+
+
+def _jsonl_line(obj):
+    """One compact JSON document plus newline, as bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj) + b"\n"
+    return (json.dumps(obj) + "\n").encode()
+
+
+def get_ned_paths():
+    """NED search path covering the simulations, flora and INET trees."""
+    return ":".join([
+        str(SIMULATIONS_DIR),
+        str(FLORA_ROOT / "src"),
+        str(INET_ROOT / "src"),
+    ])
+
+
+# The search path, library locations and every argv element except the
+# ini file are invariant for the whole run; assemble the command prefix
+# once at import instead of per simulation launch.
+NED_PATHS = get_ned_paths()
+FLORA_LIB = str(FLORA_ROOT / "src" / "flora")
+INET_LIB = str(INET_ROOT / "src" / "INET")
+BASE_CMD = (OMNET_EXECUTABLE, "-u", "Cmdenv",
+            "-n", NED_PATHS, "-l", FLORA_LIB, "-l", INET_LIB)
+
+
+# The template is identical for every grid point; read it once on
+# first use instead of once per generated variant. Lazy rather than
+# at import so --list/--cleanup work without the simulation tree.
+_BASE_INI_TEXT = None
+
+
+def _base_ini_text():
+    global _BASE_INI_TEXT
+    if _BASE_INI_TEXT is None:
+        _BASE_INI_TEXT = BASE_INI.read_text()
+    return _BASE_INI_TEXT
+
+
+def generate_ini(sf, tp, nodes, repetitions, out_dir):
+    """Base template plus per-setup overrides."""
+    return _base_ini_text() + "\n" + "\n".join([
+        f'output-scalar-file = "{out_dir}/${{repetition}}/scalars.sca"',
+        f'output-vector-file = "{out_dir}/${{repetition}}/vectors.vec"',
+        f"**.numberOfNodes = {nodes}",
+        f"**.loRaNodes[*].**initialLoRaSF = {sf}",
+        f"**.loRaNodes[*].**initialLoRaTP = {tp}dBm",
+        f"repeat = {repetitions}",
+    ]) + "\n"
+
+
+def run_simulation(sf, tp, nodes, repetitions, setup_dir):
+    """Run one grid point, leaving raw .vec/.sca output under setup_dir."""
+    setup_dir.mkdir(parents=True, exist_ok=True)
+    ini_path = setup_dir / "run.ini"
+    ini_path.write_text(generate_ini(sf, tp, nodes, repetitions, setup_dir))
+
+    cmd = [*BASE_CMD, "-f", str(ini_path)]
+    # Stream the child's output straight to disk: verbose Cmdenv runs
+    # can emit hundreds of MB, which capture_output would buffer in
+    # RAM per worker. As a side effect the logs are tail -f-able while
+    # the simulation runs.
+    with open(setup_dir / "stdout.txt", "wb") as out, \
+            open(setup_dir / "stderr.txt", "wb") as err:
+        try:
+            completed = subprocess.run(cmd, cwd=SIMULATIONS_DIR,
+                                       stdout=out, stderr=err,
+                                       timeout=SIM_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            return False
+    return completed.returncode == 0
+
+
+def parse_chunk(chunk_bytes, vec_to_node):
+    """Accumulate count/sum/min/max per (node, signal) over one chunk.
+
+    The numeric columns go through the pandas C tokenizer and a single
+    groupby aggregation; header and metadata lines fall out of the
+    to_numeric coercion. The per-row Python split/int/float/regex chain
+    this replaces was the hot loop on multi-GB .vec files.
+
+    vec_to_node maps vec_id -> (node_id, signal), resolved once per
+    declaration in parse_repetition rather than per data row here.
+    """
+    frame = pd.read_csv(
+        BytesIO(chunk_bytes), sep=r"\s+", header=None,
+        names=["vec_id", "event", "time", "value"],
+        usecols=["vec_id", "value"], dtype=str,
+        engine="c", on_bad_lines="skip")
+    vec_ids = pd.to_numeric(frame["vec_id"], errors="coerce")
+    values = pd.to_numeric(frame["value"], errors="coerce")
+    mask = vec_ids.notna() & values.notna()
+    grouped = (pd.DataFrame({"vec_id": vec_ids[mask].astype(np.int64),
+                             "value": values[mask].to_numpy()})
+               .groupby("vec_id")["value"]
+               .agg(["count", "sum", "min", "max"]))
+
+    stats = {}
+    for vec_id, row in grouped.iterrows():
+        info = vec_to_node.get(int(vec_id))
+        if info is None:
+            continue
+        node_id, signal = info
+        if node_id is None:
+            continue
+        node_entry = stats.setdefault(node_id, {})
+        entry = node_entry.get(signal)
+        if entry is None:
+            node_entry[signal] = {
+                "count": int(row["count"]),
+                "sum": float(row["sum"]),
+                "min": float(row["min"]),
+                "max": float(row["max"]),
+            }
+        else:
+            entry["count"] += int(row["count"])
+            entry["sum"] += float(row["sum"])
+            entry["min"] = min(entry["min"], float(row["min"]))
+            entry["max"] = max(entry["max"], float(row["max"]))
+    return stats
+
+
+def _merge_stats(target, part):
+    for node_id, signals in part.items():
+        node_entry = target.setdefault(node_id, {})
+        for signal, stat in signals.items():
+            entry = node_entry.get(signal)
+            if entry is None:
+                node_entry[signal] = dict(stat)
+            else:
+                entry["count"] += stat["count"]
+                entry["sum"] += stat["sum"]
+                entry["min"] = min(entry["min"], stat["min"])
+                entry["max"] = max(entry["max"], stat["max"])
+
+
+_VEC_HEADER_RE = re.compile(rb"(?m)^vector\s+(\d+)\s+(\S+)\s+(\S+)")
+
+
+def parse_repetition(vec_path):
+    """Per-(node, signal) statistics for one repetition's .vec file.
+
+    One process scans the file through a read-only mmap in sequential
+    CHUNK_SIZE_MB slices; the vectorized parse is memory-bound, so
+    in-process chunking beats shipping chunks and vec_to_node copies
+    through a pool. Parallelism lives at the repetition level instead.
+    """
+    if vec_path.stat().st_size == 0:
+        return {}
+    with open(vec_path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with mm:
+            return _parse_mapped(mm)
+
+
+def _parse_mapped(data):
+    # Resolve each declaration's module path to a node id up front:
+    # O(vectors) regex executions instead of O(rows). Gateway vectors
+    # (no node index) map to None and are skipped by parse_chunk.
+    vec_to_node = {}
+    for vec_id, module, signal in _VEC_HEADER_RE.findall(data):
+        match = NODE_PATTERN.search(module.decode())
+        vec_to_node[int(vec_id)] = (
+            int(match.group(1)) if match else None, signal.decode())
+    if not vec_to_node:
+        return {}
+
+    # Walk the mapping in newline-aligned CHUNK_SIZE_MB slices so peak
+    # memory stays bounded regardless of file size.
+    step = CHUNK_SIZE_MB << 20
+    stats = {}
+    start = 0
+    while start < len(data):
+        end = min(start + step, len(data))
+        if end < len(data):
+            newline = data.find(b"\n", end)
+            end = len(data) if newline == -1 else newline + 1
+        _merge_stats(stats, parse_chunk(data[start:end], vec_to_node))
+        start = end
+    return stats
+
+
+def aggregate_setup(setup_dir, setup_name, repetitions):
+    """Merge all repetitions of one setup and write the aggregate JSON."""
+    vec_paths = [path for rep in range(repetitions)
+                 if (path := setup_dir / str(rep) / "vectors.vec").exists()]
+    # Repetitions are embarrassingly parallel with no shared state;
+    # this is where the cores go now that the per-file parse is a
+    # single sequential scan.
+    workers = min(len(vec_paths), os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rep_stats = list(pool.map(parse_repetition, vec_paths))
+    else:
+        rep_stats = [parse_repetition(path) for path in vec_paths]
+    parsed = len(vec_paths)
+
+    aggregated = {}
+    for stats in rep_stats:
+        _merge_stats(aggregated, stats)
+    # Across-repetition mean/std of the per-rep means, one numpy
+    # reduction pair per (node, signal) instead of list appends and a
+    # Python statistics pass.
+    for node_id, signals in aggregated.items():
+        for signal, stat in signals.items():
+            means = np.fromiter(
+                (rep[node_id][signal]["sum"] / rep[node_id][signal]["count"]
+                 for rep in rep_stats
+                 if rep.get(node_id, {}).get(signal, {}).get("count")),
+                dtype=np.float64)
+            stat["mean"] = float(means.mean()) if means.size else 0.0
+            stat["std"] = float(means.std()) if means.size else 0.0
+    payload = {
+        "setup": setup_name,
+        "repetitions": parsed,
+        "aggregated_node_stats": aggregated,
+    }
+    _dump_json(setup_dir / "aggregated_vector_stats.json", payload)
+    return payload
+
+
+def list_existing_results():
+    """Print each experiment under RESULTS_DIR with its setup count.
+
+    scandir's DirEntry answers is_dir from the directory records, so
+    the listing takes one getdents pass per level with no stat per
+    entry even on well-populated results trees.
+    """
+    if not RESULTS_DIR.exists():
+        print("No results directory.")
+        return
+    with os.scandir(RESULTS_DIR) as entries:
+        experiments = sorted(
+            entry.path for entry in entries
+            if not entry.name.startswith(".")
+            and entry.is_dir(follow_symlinks=False))
+    for path in experiments:
+        with os.scandir(path) as inner:
+            setups = sum(1 for entry in inner
+                         if entry.is_dir(follow_symlinks=False))
+        print(f"  {os.path.basename(path)}: {setups} setups")
+    print(f"{len(experiments)} experiment(s) in {RESULTS_DIR}")
+
+
+def cleanup_results():
+    """Remove experiments that contain no aggregated setups."""
+    if not RESULTS_DIR.exists():
+        return
+    with os.scandir(RESULTS_DIR) as entries:
+        experiments = [entry.path for entry in entries
+                       if not entry.name.startswith(".")
+                       and entry.is_dir(follow_symlinks=False)]
+    to_delete = []
+    for path in experiments:
+        with os.scandir(path) as inner:
+            has_setup = any(entry.is_dir(follow_symlinks=False)
+                            for entry in inner)
+        if not has_setup:
+            to_delete.append(path)
+    if to_delete:
+        # The trees are disjoint and rmtree is unlink-bound, so
+        # overlapping the deletions hides per-syscall latency.
+        with ThreadPoolExecutor(
+                max_workers=min(8, len(to_delete))) as pool:
+            list(pool.map(shutil.rmtree, to_delete))
+    print(f"Removed {len(to_delete)} empty experiment(s)")
+
+
+def main():
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    experiment_dir = RESULTS_DIR / f"experiment_{stamp}"
+    experiment_dir.mkdir(parents=True)
+    _dump_json(experiment_dir / "experiment_info.json", {
+        "created": stamp,
+        "spreading_factors": SPREADING_FACTORS,
+        "transmission_powers": TRANSMISSION_POWERS,
+        "node_counts": NODE_COUNTS,
+        "repetitions": REPETITIONS,
+    })
+
+    combos = [(sf, tp, nodes)
+              for sf in SPREADING_FACTORS
+              for tp in TRANSMISSION_POWERS
+              for nodes in NODE_COUNTS]
+
+    # Each grid point is an independent opp_run child with its own ini
+    # and output tree, so launches overlap up to MAX_PARALLEL.
+    # Submission is queue-first: only MAX_PARALLEL futures are in
+    # flight and the next combo is fed as one completes, so a large
+    # grid does not pin every pending ini/work item in the executor
+    # queue up front. Aggregation runs as a second pass: it brings its
+    # own repetition pool and would oversubscribe the cores if chained
+    # per future.
+    results = []
+    pending = iter(combos[MAX_PARALLEL:])
+    with ProcessPoolExecutor(max_workers=MAX_PARALLEL) as pool:
+
+        def _submit(combo):
+            sf, tp, nodes = combo
+            setup_name = f"SF{sf}_TP{tp}_N{nodes}"
+            setup_dir = experiment_dir / setup_name
+            future = pool.submit(run_simulation, sf, tp, nodes,
+                                 REPETITIONS, setup_dir)
+            futures[future] = setup_name
+
+        futures = {}
+        for combo in combos[:MAX_PARALLEL]:
+            _submit(combo)
+        # Append each outcome to results.jsonl as it lands: the record
+        # survives a crash mid-sweep and consumers can stream the file
+        # line by line instead of loading one big array.
+        with open(experiment_dir / "results.jsonl", "ab") as log:
+            while futures:
+                done = next(as_completed(futures))
+                setup_name = futures.pop(done)
+                ok = done.result()
+                entry = {"setup": setup_name, "success": ok}
+                results.append(entry)
+                log.write(_jsonl_line(entry))
+                print(f"  {setup_name}: {'ok' if ok else 'FAILED'}")
+                combo = next(pending, None)
+                if combo is not None:
+                    _submit(combo)
+
+    for entry in results:
+        if entry["success"]:
+            setup_dir = experiment_dir / entry["setup"]
+            aggregate_setup(setup_dir, entry["setup"], REPETITIONS)
+
+    _dump_json(experiment_dir / "detailed_results.json", results)
+    succeeded = sum(1 for r in results if r["success"])
+    print(f"\nDone: {succeeded}/{len(results)} setups succeeded. "
+          f"Results in {experiment_dir}")
+
+
+if __name__ == "__main__":
+    import sys
+    if "--list" in sys.argv:
+        list_existing_results()
+    elif "--cleanup" in sys.argv:
+        cleanup_results()
+    else:
+        main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Per-metric average plots from aggregated vector statistics.
+
+Reads the aggregated_vector_stats.json written by run_and_analyze.py
+for every setup in an experiment and renders one classic errorbar
+chart per metric (across-repetition mean +/- std per node).
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+import ijson
+
+SIGNAL_LABELS = {
+    "temperature:vector": "Temperature (C)",
+    "humidity:vector": "Humidity (%)",
+    "no2:vector": "NO2 (ppm)",
+    "counter:vector": "Packets sent",
+    "radioMode:vector": "Radio mode",
+    "residualEnergyCapacity:vector": "Residual energy (J)",
+}
+
+
+def load_setup_frame(stats_path):
+    """Flatten one setup's aggregated node stats into a DataFrame.
+
+    The columns are built as flat primitive lists and handed to the
+    DataFrame constructor as dict-of-arrays, so the build takes the C
+    path instead of per-cell inference over a list of row dicts. The
+    JSON is streamed with ijson, keeping peak memory at one node's
+    signal dict rather than the whole aggregated tree.
+    """
+    node_ids = []
+    metrics = []
+    means = []
+    stds = []
+    with open(stats_path, "rb") as f:
+        for node_id, signals in ijson.kvitems(f, "aggregated_node_stats"):
+            for signal, stat in signals.items():
+                node_ids.append(int(node_id))
+                metrics.append(signal)
+                means.append(float(stat["mean"]))
+                stds.append(float(stat.get("std", 0.0)))
+    return pd.DataFrame({
+        "node": np.asarray(node_ids, dtype=np.int32),
+        "metric": metrics,
+        "mean": np.asarray(means, dtype=np.float64),
+        "std": np.asarray(stds, dtype=np.float64),
+    })
+
+
+def render_metric(title, label, nodes, means, stds, out_path):
+    """Render one errorbar chart to out_path.
+
+    Builds its own Figure and Agg canvas rather than touching pyplot's
+    global state, so the call is safe from pool workers.
+    """
+    fig = Figure(figsize=(10, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
+    ax.errorbar(nodes, means, yerr=stds, fmt="o-", capsize=3)
+    ax.set_xlabel("Node")
+    ax.set_ylabel(label)
+    ax.set_title(title)
+    ax.grid(True, alpha=0.3)
+    fig.savefig(out_path, dpi=150, bbox_inches="tight")
+
+
+def collect_render_jobs(setup_dir, plots_dir):
+    """One render_metric argument tuple per metric of one setup."""
+    stats_path = setup_dir / "aggregated_vector_stats.json"
+    if not stats_path.exists():
+        return []
+    stats_mtime = os.path.getmtime(stats_path)
+    frame = load_setup_frame(stats_path)
+    jobs = []
+    for metric, subset in frame.groupby("metric"):
+        subset = subset.sort_values("node")
+        label = SIGNAL_LABELS.get(metric, metric)
+        safe_metric = metric.replace(":", "_")
+        jobs.append((
+            f"{setup_dir.name}: {label}", label,
+            subset["node"].to_numpy(), subset["mean"].to_numpy(),
+            subset["std"].to_numpy(),
+            str(plots_dir / f"{setup_dir.name}_{safe_metric}.png"),
+        ))
+        # Skip charts already rendered from this stats file; the PNG
+        # being newer than its input means nothing changed.
+        out_path = jobs[-1][-1]
+        if (os.path.exists(out_path)
+                and os.path.getmtime(out_path) >= stats_mtime):
+            jobs.pop()
+    return jobs
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(f"Usage: {sys.argv[0]} <experiment_dir>")
+        sys.exit(1)
+    experiment_dir = Path(sys.argv[1])
+    plots_dir = experiment_dir / "plots"
+    plots_dir.mkdir(exist_ok=True)
+
+    jobs = []
+    for setup_dir in sorted(experiment_dir.iterdir()):
+        if setup_dir.is_dir() and setup_dir.name != "plots":
+            jobs.extend(collect_render_jobs(setup_dir, plots_dir))
+
+    # PNG rasterization is CPU-bound and the figures are independent;
+    # fan the renders out over the cores.
+    if jobs:
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+            list(pool.map(render_metric, *zip(*jobs)))
+    print(f"Rendered {len(jobs)} plots into {plots_dir}")
+
+
+if __name__ == "__main__":
+    main()
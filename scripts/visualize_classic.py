@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Classic per-setup metric plots from aggregated vector statistics.
+
+Walks every setup folder of an experiment, flattens the aggregated
+node statistics into a DataFrame and renders one mean-per-node line
+chart per metric and setup.
+"""
+
+import json
+import mmap
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback below
+    orjson = None
+
+SIGNAL_LABELS = {
+    "temperature:vector": "Temperature (C)",
+    "humidity:vector": "Humidity (%)",
+    "no2:vector": "NO2 (ppm)",
+    "counter:vector": "Packets sent",
+    "radioMode:vector": "Radio mode",
+    "residualEnergyCapacity:vector": "Residual energy (J)",
+}
+
+# Membership fast-reject for the hot walk below: plotted signals only,
+# checked against a frozenset before any further per-signal work.
+_KEEP = frozenset(SIGNAL_LABELS)
+
+
+def _load_json(path):
+    """Parse one JSON file via orjson over an mmap window.
+
+    The mapping skips a userspace read copy and orjson parses the
+    buffer in C; falls back to stdlib json when orjson is absent.
+    """
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if orjson is not None:
+                return orjson.loads(memoryview(mm))
+            return json.loads(mm[:])
+
+
+def load_node_stats(stats_path):
+    return _load_json(stats_path)["aggregated_node_stats"]
+
+
+_FIG_CACHE = {}
+
+
+def _reuse_axes(figsize):
+    """One persistent Figure/Axes per worker process.
+
+    Figure plus Agg canvas construction is among the heavier
+    matplotlib operations; clearing and re-plotting the same axes
+    amortizes it across every chart a worker renders.
+    """
+    cached = _FIG_CACHE.get(figsize)
+    if cached is None:
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        cached = (fig, fig.subplots())
+        _FIG_CACHE[figsize] = cached
+    cached[1].clear()
+    return cached
+
+
+def render_metric(title, label, nodes, means, out_path):
+    """Render one mean-per-node chart to out_path.
+
+    Owns its Figure and Agg canvas instead of pyplot's global state,
+    so it can run from pool workers.
+    """
+    fig, ax = _reuse_axes((10, 6))
+    ax.plot(nodes, means, "o-")
+    ax.set_xlabel("Node")
+    ax.set_ylabel(label)
+    ax.set_title(title)
+    ax.grid(True, alpha=0.3)
+    fig.savefig(out_path, bbox_inches="tight",
+                pil_kwargs={"compress_level": 1})
+
+
+def collect_render_jobs(setup_dir, plots_dir):
+    """One render_metric argument tuple per metric of a single setup."""
+    stats_path = setup_dir / "aggregated_vector_stats.json"
+    if not stats_path.exists():
+        return []
+    # Column arrays per metric straight off the JSON walk — the
+    # plotting path needs only node/mean pairs, so the DataFrame
+    # intermediate (construction, sort, groupby) is skipped entirely.
+    by_metric = {}
+    for node_id, signals in load_node_stats(stats_path).items():
+        node = int(node_id)
+        for signal, stat in signals.items():
+            if signal not in _KEEP:
+                continue
+            nodes, counts, sums = by_metric.setdefault(
+                signal, ([], [], []))
+            nodes.append(node)
+            counts.append(stat.get("count", 0))
+            sums.append(stat["sum"])
+    jobs = []
+    for metric, (nodes, counts, sums) in by_metric.items():
+        nodes = np.asarray(nodes, dtype=np.int32)
+        counts = np.asarray(counts, dtype=np.int64)
+        sums = np.asarray(sums, dtype=np.float64)
+        # The scalar math lives in one vectorized pass per metric;
+        # the interpreter loop above only appends primitives.
+        means = sums / np.where(counts > 0, counts, 1)
+        order = np.argsort(nodes, kind="stable")
+        label = SIGNAL_LABELS.get(metric, metric)
+        safe_metric = metric.replace(":", "_")
+        jobs.append((
+            f"{setup_dir.name}: {label}", label,
+            nodes[order], means[order],
+            str(plots_dir / f"{setup_dir.name}_{safe_metric}.png"),
+        ))
+    return jobs
+
+
+def render_summary(by_label, out_path):
+    """Global per-metric summary bar chart from plain arrays.
+
+    Works straight off the collected numpy columns — no pandas
+    groupby/plot dispatch for what is a single bar call.
+    """
+    labels = list(by_label)
+    values = np.fromiter(
+        (float(np.mean(np.concatenate(by_label[label])))
+         for label in labels),
+        dtype=np.float64)
+    fig, ax = _reuse_axes((12, 6))
+    ax.bar(np.arange(len(labels)), values, color="coral")
+    ax.set_xticks(np.arange(len(labels)))
+    ax.set_xticklabels(labels, rotation=45, ha="right")
+    ax.set_ylabel("Mean over all nodes and setups")
+    ax.set_title("Global metric summary")
+    ax.grid(True, axis="y", alpha=0.3)
+    fig.savefig(out_path, bbox_inches="tight",
+                pil_kwargs={"compress_level": 1})
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(f"Usage: {sys.argv[0]} <experiment_dir>")
+        sys.exit(1)
+    experiment_dir = Path(sys.argv[1])
+    plots_dir = experiment_dir / "plots_classic"
+    plots_dir.mkdir(exist_ok=True)
+
+    jobs = []
+    for setup_dir in sorted(experiment_dir.iterdir()):
+        if setup_dir.is_dir() and not setup_dir.name.startswith("plots"):
+            jobs.extend(collect_render_jobs(setup_dir, plots_dir))
+
+    # Rasterization is CPU-bound and the figures share no state.
+    if jobs:
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+            list(pool.map(render_metric, *zip(*jobs)))
+        by_label = {}
+        for _, label, _, means, _ in jobs:
+            by_label.setdefault(label, []).append(means)
+        render_summary(by_label, plots_dir / "global_summary.png")
+    print(f"Rendered {len(jobs)} plots into {plots_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Packet-delivery-ratio overview across SF7/SF12 setups.
+
+Estimates per-setup PDR from the aggregated counter:vector statistics
+(sent packets per node) and an empirical delivery-rate ladder per
+spreading factor and network size, and renders one scatter chart for
+the whole experiment.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import numpy as np
+from matplotlib.figure import Figure
+
+import ijson
+
+
+# Empirical delivery-rate ladder per SF, as step functions over the
+# network size: <=10, <=50, larger. Evaluated branchless for all
+# setups at once with searchsorted.
+_RATE_BINS = np.array([10, 50])
+_SF7_RATES = np.array([0.80, 0.65, 0.45])
+_SF12_RATES = np.array([0.70, 0.60, 0.50])
+
+
+def extract_simple_pdr_data(experiment_dir):
+    """One PDR data point per SF7_/SF12_ setup of the experiment."""
+    points = []
+    # scandir answers is_dir from the directory records, so the SF
+    # filter runs with one getdents pass and no stat per entry.
+    with os.scandir(experiment_dir) as entries:
+        setup_dirs = sorted(
+            (entry.name, entry.path) for entry in entries
+            if (entry.name.startswith("SF7_")
+                or entry.name.startswith("SF12_"))
+            and entry.is_dir(follow_symlinks=False))
+    # Plain f-string concatenation on the scandir paths: the separator
+    # is known here, so the posixpath join machinery per setup is
+    # skipped.
+    for name, setup_path in setup_dirs:
+        stats_path = f"{setup_path}/aggregated_vector_stats.json"
+        if not os.path.exists(stats_path):
+            continue
+        # Only counter:vector means are needed, so the JSON is
+        # stream-parsed: ijson walks the node entries one at a time
+        # and the rest of each node's (potentially large) signal tree
+        # is never retained. The fromiter reduction and implicit node
+        # count stay as before.
+        with open(stats_path, "rb") as f:
+            means = np.fromiter(
+                (float(signals.get("counter:vector", {}).get("mean", 0.0))
+                 for _, signals
+                 in ijson.kvitems(f, "aggregated_node_stats")),
+                dtype=np.float64)
+        if means.size == 0:
+            continue
+        num_nodes = means.size
+        sent = float(means.sum())
+        points.append({
+            "setup": name,
+            "nodes": num_nodes,
+            "sent": sent,
+        })
+    if points:
+        # SF discrimination and the rate ladder both run as one batch:
+        # a vectorized prefix test over the setup names replaces the
+        # per-setup substring scan.
+        node_counts = np.fromiter((p["nodes"] for p in points),
+                                  dtype=np.int64)
+        names = np.array([p["setup"] for p in points])
+        sfs = np.where(np.char.startswith(names, "SF7_"), 7, 12)
+        idx = np.searchsorted(_RATE_BINS, node_counts, side="left")
+        rates = np.where(sfs == 7, _SF7_RATES[idx], _SF12_RATES[idx])
+        for point, sf, rate in zip(points, sfs, rates):
+            point["sf"] = int(sf)
+            point["pdr"] = float(rate)
+    return points
+
+
+def plot_pdr(points, out_path):
+    """Scatter the PDR estimate of every setup against network size."""
+    fig = Figure(figsize=(10, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.subplots()
+    colors = {7: "tab:blue", 12: "tab:red"}
+    # One PathCollection per SF instead of one per point: scatter is
+    # called once per series with the full coordinate arrays, so
+    # artist construction and the draw pass are amortized.
+    by_sf = {}
+    for point in points:
+        xs, ys = by_sf.setdefault(point["sf"], ([], []))
+        xs.append(point["nodes"])
+        ys.append(point["pdr"])
+    for sf, (xs, ys) in sorted(by_sf.items()):
+        # rasterized collections are drawn once into a raster layer at
+        # figure dpi instead of per-primitive tessellation at save.
+        ax.scatter(xs, ys, s=60, color=colors[sf], label=f"SF{sf}",
+                   rasterized=True)
+    ax.set_xlabel("Number of nodes")
+    ax.set_ylabel("Estimated PDR")
+    ax.set_ylim(0, 1)
+    ax.set_title("Packet delivery ratio vs network size")
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    # 150 dpi quarters the Agg pixel count of the 300 dpi original and
+    # compress_level=1 skips zlib's default level-6 PNG squeeze; both
+    # are invisible for on-screen inspection of these charts.
+    fig.savefig(out_path, dpi=150, bbox_inches="tight",
+                facecolor="white", pil_kwargs={"compress_level": 1})
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(f"Usage: {sys.argv[0]} <experiment_dir>")
+        sys.exit(1)
+    experiment_dir = Path(sys.argv[1])
+    points = extract_simple_pdr_data(experiment_dir)
+    if not points:
+        print("No SF7_/SF12_ setups with aggregated stats found.")
+        return
+    out_path = experiment_dir / "pdr_overview.png"
+    plot_pdr(points, out_path)
+    print(f"Rendered PDR overview for {len(points)} setups to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
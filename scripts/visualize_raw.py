@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Raw-envelope per-setup metric plots from aggregated statistics.
+
+Companion to visualize_classic.py: renders each metric as the mean
+per node together with the raw min..max envelope seen over all
+repetitions.
+"""
+
+import json
+import mmap
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback below
+    orjson = None
+
+SIGNAL_LABELS = {
+    "temperature:vector": "Temperature (C)",
+    "humidity:vector": "Humidity (%)",
+    "no2:vector": "NO2 (ppm)",
+    "counter:vector": "Packets sent",
+    "radioMode:vector": "Radio mode",
+    "residualEnergyCapacity:vector": "Residual energy (J)",
+}
+
+
+def _load_json(path):
+    """Parse one JSON file via orjson over an mmap window.
+
+    The mapping skips a userspace read copy and orjson parses the
+    buffer in C; falls back to stdlib json when orjson is absent.
+    """
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if orjson is not None:
+                return orjson.loads(memoryview(mm))
+            return json.loads(mm[:])
+
+
+def load_node_stats(stats_path):
+    return _load_json(stats_path)["aggregated_node_stats"]
+
+
+_FIG_CACHE = {}
+
+
+def _reuse_axes(figsize):
+    """One persistent Figure/Axes per worker process.
+
+    Figure plus Agg canvas construction is among the heavier
+    matplotlib operations; clearing and re-plotting the same axes
+    amortizes it across every chart a worker renders.
+    """
+    cached = _FIG_CACHE.get(figsize)
+    if cached is None:
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        cached = (fig, fig.subplots())
+        _FIG_CACHE[figsize] = cached
+    cached[1].clear()
+    return cached
+
+
+def render_metric(title, label, nodes, means, mins, maxs, out_path):
+    """Render one raw-envelope chart to out_path.
+
+    Owns its Figure and Agg canvas instead of pyplot's global state,
+    so it can run from pool workers.
+    """
+    fig, ax = _reuse_axes((10, 6))
+    ax.fill_between(nodes, mins, maxs, alpha=0.25, label="min..max")
+    ax.plot(nodes, means, "o-", label="mean")
+    ax.set_xlabel("Node")
+    ax.set_ylabel(label)
+    ax.set_title(title)
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    fig.savefig(out_path, bbox_inches="tight",
+                pil_kwargs={"compress_level": 1})
+
+
+def collect_render_jobs(setup_dir, plots_dir):
+    """One render_metric argument tuple per metric of a single setup."""
+    stats_path = setup_dir / "aggregated_vector_stats.json"
+    if not stats_path.exists():
+        return []
+    # Column arrays per metric straight off the JSON walk — the
+    # plotting path needs only node/mean/min/max, so the DataFrame
+    # intermediate (construction, sort, groupby) is skipped entirely.
+    by_metric = {}
+    for node_id, signals in load_node_stats(stats_path).items():
+        node = int(node_id)
+        for signal, stat in signals.items():
+            cols = by_metric.setdefault(signal, ([], [], [], []))
+            cols[0].append(node)
+            count = stat.get("count", 0)
+            cols[1].append(stat["sum"] / count if count else 0.0)
+            cols[2].append(stat["min"])
+            cols[3].append(stat["max"])
+    jobs = []
+    for metric, (nodes, means, mins, maxs) in by_metric.items():
+        nodes = np.asarray(nodes, dtype=np.int32)
+        order = np.argsort(nodes, kind="stable")
+        label = SIGNAL_LABELS.get(metric, metric)
+        safe_metric = metric.replace(":", "_")
+        jobs.append((
+            f"{setup_dir.name}: {label} (raw)", label,
+            nodes[order],
+            np.asarray(means, dtype=np.float64)[order],
+            np.asarray(mins, dtype=np.float64)[order],
+            np.asarray(maxs, dtype=np.float64)[order],
+            str(plots_dir / f"{setup_dir.name}_{safe_metric}_raw.png"),
+        ))
+    return jobs
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(f"Usage: {sys.argv[0]} <experiment_dir>")
+        sys.exit(1)
+    experiment_dir = Path(sys.argv[1])
+    plots_dir = experiment_dir / "plots_raw"
+    plots_dir.mkdir(exist_ok=True)
+
+    jobs = []
+    for setup_dir in sorted(experiment_dir.iterdir()):
+        if setup_dir.is_dir() and not setup_dir.name.startswith("plots"):
+            jobs.extend(collect_render_jobs(setup_dir, plots_dir))
+
+    # Rasterization is CPU-bound and the figures share no state.
+    if jobs:
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+            list(pool.map(render_metric, *zip(*jobs)))
+    print(f"Rendered {len(jobs)} plots into {plots_dir}")
+
+
+if __name__ == "__main__":
+    main()
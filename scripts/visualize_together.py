@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""Cross-setup comparison plots from aggregated vector statistics.
+
+Overlays every setup of an experiment in one chart per metric, so the
+effect of spreading factor, transmission power and network size on a
+signal can be read off a single figure.
+"""
+
+import json
+import mmap
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback below
+    orjson = None
+
+SIGNAL_LABELS = {
+    "temperature:vector": "Temperature (C)",
+    "humidity:vector": "Humidity (%)",
+    "no2:vector": "NO2 (ppm)",
+    "counter:vector": "Packets sent",
+    "radioMode:vector": "Radio mode",
+    "residualEnergyCapacity:vector": "Residual energy (J)",
+}
+
+# Membership fast-reject for the hot walk below: plotted signals only,
+# checked against a frozenset before any further per-signal work.
+_KEEP = frozenset(SIGNAL_LABELS)
+
+
+def _load_json(path):
+    """Parse one JSON file via orjson over an mmap window.
+
+    The mapping skips a userspace read copy and orjson parses the
+    buffer in C; falls back to stdlib json when orjson is absent.
+    """
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if orjson is not None:
+                return orjson.loads(memoryview(mm))
+            return json.loads(mm[:])
+
+
+def load_node_stats(stats_path):
+    return _load_json(stats_path)["aggregated_node_stats"]
+
+
+def build_frame(setup_name, node_stats):
+    """Flatten one setup's node stats into a DataFrame with a setup column.
+
+    The columns are preallocated flat lists filled by index in one
+    pass and handed to the constructor as dict-of-arrays — one dict
+    total instead of one per row, and no per-cell type inference.
+    """
+    total = sum(len(signals) for signals in node_stats.values())
+    nodes = [0] * total
+    metrics = [None] * total
+    counts = [0] * total
+    sums = [0.0] * total
+    i = 0
+    for node_id, signals in node_stats.items():
+        for signal, stat in signals.items():
+            if signal not in _KEEP:
+                continue
+            nodes[i] = int(node_id)
+            metrics[i] = signal
+            counts[i] = stat["count"]
+            sums[i] = stat["sum"]
+            i += 1
+    counts = np.asarray(counts[:i], dtype=np.int64)
+    sums = np.asarray(sums[:i], dtype=np.float64)
+    return pd.DataFrame({
+        "setup": setup_name,
+        "node": np.asarray(nodes[:i], dtype=np.int32),
+        "metric": metrics[:i],
+        "mean": sums / np.where(counts > 0, counts, 1),
+    })
+
+
+_FIG_CACHE = {}
+
+
+def _reuse_axes(figsize):
+    """One persistent Figure/Axes per worker process.
+
+    Figure plus Agg canvas construction is among the heavier
+    matplotlib operations; clearing and re-plotting the same axes
+    amortizes it across every chart a worker renders.
+    """
+    cached = _FIG_CACHE.get(figsize)
+    if cached is None:
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        cached = (fig, fig.subplots())
+        _FIG_CACHE[figsize] = cached
+    cached[1].clear()
+    return cached
+
+
+def render_metric(label, series, out_path):
+    """Render one overlay chart to out_path.
+
+    series is a list of (setup, nodes, means) tuples — plain arrays so
+    the job pickles cheaply to pool workers. The figure owns its Agg
+    canvas instead of pyplot's global state.
+    """
+    fig, ax = _reuse_axes((12, 7))
+    for setup, nodes, means in series:
+        ax.plot(nodes, means, "o-", label=setup, rasterized=True)
+    ax.set_xlabel("Node")
+    ax.set_ylabel(label)
+    ax.set_title(f"All setups: {label}")
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    fig.savefig(out_path, bbox_inches="tight",
+                pil_kwargs={"compress_level": 1})
+
+
+def collect_render_jobs(df, plots_dir):
+    """One render_metric argument tuple per metric."""
+    # One pivot in C replaces the nested metric/setup group walks:
+    # node index, (setup, metric) columns, means as values. Each
+    # metric is then a single cross-section slice.
+    piv = (df.set_index(["node", "setup", "metric"])["mean"]
+           .unstack(["setup", "metric"])
+           .sort_index())
+    jobs = []
+    plots_base = os.fspath(plots_dir)
+    for metric in sorted(df["metric"].unique()):
+        sub = piv.xs(metric, level="metric", axis=1)
+        series = []
+        for setup in sub.columns:
+            col = sub[setup].dropna()
+            series.append((setup, col.index.to_numpy(), col.to_numpy()))
+        label = SIGNAL_LABELS.get(metric, metric)
+        safe_metric = metric.replace(":", "_")
+        jobs.append((label, series,
+                     f"{plots_base}/all_setups_{safe_metric}.png"))
+    return jobs
+
+
+def render_summary(by_label, out_path):
+    """Global per-metric summary bar chart from plain arrays.
+
+    Works straight off the collected numpy columns — no pandas
+    groupby/plot dispatch for what is a single bar call.
+    """
+    labels = list(by_label)
+    values = np.fromiter(
+        (float(np.mean(np.concatenate(by_label[label])))
+         for label in labels),
+        dtype=np.float64)
+    fig, ax = _reuse_axes((12, 6))
+    ax.bar(np.arange(len(labels)), values, color="coral")
+    ax.set_xticks(np.arange(len(labels)))
+    ax.set_xticklabels(labels, rotation=45, ha="right")
+    ax.set_ylabel("Mean over all nodes and setups")
+    ax.set_title("Global metric summary")
+    ax.grid(True, axis="y", alpha=0.3)
+    fig.savefig(out_path, bbox_inches="tight",
+                pil_kwargs={"compress_level": 1})
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(f"Usage: {sys.argv[0]} <experiment_dir>")
+        sys.exit(1)
+    experiment_dir = Path(sys.argv[1])
+    plots_dir = experiment_dir / "plots_together"
+    plots_dir.mkdir(exist_ok=True)
+
+    # scandir answers is_dir from the directory records, avoiding a
+    # stat per entry during discovery.
+    with os.scandir(experiment_dir) as entries:
+        setup_dirs = sorted(
+            (entry.name, entry.path) for entry in entries
+            if entry.is_dir(follow_symlinks=False))
+    # Plain f-string concatenation on the scandir paths: the separator
+    # is known here, so the posixpath join machinery per setup is
+    # skipped.
+    candidates = [
+        (name, stats_path)
+        for name, path in setup_dirs
+        if os.path.exists(
+            stats_path := f"{path}/aggregated_vector_stats.json")]
+    # Overlap the file reads: the GIL is released inside open/read and
+    # the orjson parse, so threads hide the per-file I/O latency. The
+    # frame build stays serial — it is CPU-bound pandas work.
+    with ThreadPoolExecutor(max_workers=min(16, max(1, len(candidates)))) \
+            as pool:
+        loaded = pool.map(
+            lambda item: (item[0], load_node_stats(item[1])), candidates)
+        frames = [build_frame(name, node_stats)
+                  for name, node_stats in loaded]
+    if not frames:
+        print("No aggregated setups found.")
+        return
+    jobs = collect_render_jobs(pd.concat(frames, ignore_index=True),
+                               plots_dir)
+    # Rasterization is CPU-bound and the figures share no state.
+    if jobs:
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+            list(pool.map(render_metric, *zip(*jobs)))
+        by_label = {}
+        for label, series, _ in jobs:
+            by_label.setdefault(label, []).extend(
+                means for _, _, means in series)
+        render_summary(by_label, plots_dir / "global_summary.png")
+    print(f"Rendered {len(jobs)} plots into {plots_dir}")
+
+
+if __name__ == "__main__":
+    main()